@@ -0,0 +1,124 @@
+from concurrent.futures import Future
+from threading import Condition, Thread
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+
+# how long the first call of a batch waits for others to join it.
+DEFAULT_BATCH_WINDOW = 0.005
+
+
+class Batcher:
+    """Coalesces the calls of concurrent callers into batches.
+
+    Every ``submit`` gets a future right away. A background thread waits
+    up to ``max_wait`` seconds after the first pending item (or until
+    ``max_batch`` items are pending) and processes them all at once.
+    ``process`` receives the items and returns one result per item, the
+    results that are exceptions fail only the future of their item.
+
+    The batches are processed one at a time, in the order they were
+    submitted; while one is being processed the next one keeps growing.
+    Items with the same ``key_of`` (other than ``None``) never share a
+    batch, the later ones wait for the next.
+    """
+
+    def __init__(
+        self,
+        process: 'Callable[[List[Any]], List[Any]]',
+        max_batch: 'int',
+        max_wait: 'float'=DEFAULT_BATCH_WINDOW,
+        key_of: 'Optional[Callable[[Any], Optional[Hashable]]]'=None
+    ) -> 'None':
+        if max_batch < 1:
+            raise ValueError("'max_batch' must be greater than zero.")
+        if max_wait < 0:
+            raise ValueError("'max_wait' must be zero or a positive number.")
+
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._process = process
+        self._key_of = key_of
+        self._pending: 'List[Tuple[Any, Future]]' = []
+        self._condition = Condition()
+        self._thread: 'Optional[Thread]' = None
+
+    def submit(self, item: 'Any') -> 'Future':
+        future: 'Future' = Future()
+        with self._condition:
+            self._pending.append((item, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(
+                    target=self._run,
+                    name="noseiquela-batcher",
+                    daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def _take_batch(self) -> 'List[Tuple[Any, Future]]':
+        batch: 'List[Tuple[Any, Future]]' = []
+        left: 'List[Tuple[Any, Future]]' = []
+        keys = set()
+        for pending in self._pending:
+            key = None if self._key_of is None else self._key_of(pending[0])
+            if len(batch) >= self.max_batch or (key is not None and key in keys):
+                left.append(pending)
+                continue
+
+            if key is not None:
+                keys.add(key)
+            batch.append(pending)
+
+        self._pending = left
+        return batch
+
+    def _run(self) -> 'None':
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+
+                deadline = monotonic() + self.max_wait
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+                batch = self._take_batch()
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: 'List[Tuple[Any, Future]]') -> 'None':
+        # the cancelled futures are left out.
+        batch = [
+            (item, future) for item, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        futures = [future for _, future in batch]
+        try:
+            results = self._process([item for item, _ in batch])
+        except Exception as error:
+            for future in futures:
+                future.set_exception(error)
+            return
+
+        for future, result in zip(futures, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<Batcher - max_batch: {self.max_batch}, "
+            f"max_wait: {self.max_wait}, pending: {len(self._pending)}>"
+        )
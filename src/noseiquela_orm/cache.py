@@ -0,0 +1,630 @@
+import mmap
+import os
+import struct
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from hashlib import blake2b
+from threading import Lock
+from time import monotonic, time
+from typing import TYPE_CHECKING
+from weakref import WeakSet
+
+if TYPE_CHECKING:
+    from typing import (
+        Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple,
+        Type
+    )
+
+    from google.cloud.datastore.entity import Entity as GEntity
+    from google.cloud.datastore.key import Key as GKey
+
+    from .entity import Model
+
+
+# how long a reader may take between a miss and filling the cache,
+# and how long a write may take between locking and unlocking its keys.
+LEASE_TIMEOUT = 5.0
+LOCK_TIMEOUT = 32.0
+DEFAULT_QUERY_CACHE_TTL = 60.0
+
+_VALUE = 1
+_LEASE = 2
+_LOCK = 3
+
+
+_shared_backends: 'WeakSet[SharedMemoryBackend]' = WeakSet()
+
+
+def _new_token() -> 'int':
+    return int.from_bytes(os.urandom(8), "little") >> 1
+
+
+def dump_entity(g_entity: 'GEntity') -> 'bytes':
+    from google.cloud.datastore.helpers import entity_to_protobuf
+
+    return entity_to_protobuf(g_entity)._pb.SerializeToString()
+
+
+def load_entity(value: 'bytes') -> 'GEntity':
+    from google.cloud.datastore.helpers import entity_from_protobuf
+    from google.cloud.datastore_v1.types import entity as entity_pb2
+
+    return entity_from_protobuf(entity_pb2.Entity.pb().FromString(value))
+
+
+@contextmanager
+def writing(items: 'Iterable[Tuple[Type[Model], GKey]]') -> 'Iterator[None]':
+    # the same as 'Model._cache_writing', for the keys of many models.
+    keys_by_model: 'Dict[Type[Model], List[GKey]]' = {}
+    for model, g_key in items:
+        keys_by_model.setdefault(model, []).append(g_key)
+
+    with ExitStack() as stack:
+        for model, g_keys in keys_by_model.items():
+            stack.enter_context(model._cache_writing(g_keys)) # type: ignore
+        yield
+
+
+class CacheStats:
+    def __init__(self) -> 'None':
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def hit_ratio(self) -> 'float':
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<CacheStats - hits: {self.hits}, misses: {self.misses}, "
+            f"evictions: {self.evictions}, expirations: {self.expirations}>"
+        )
+
+
+class CacheBackend(ABC):
+    """Store behind the entity cache, keyed and valued by bytes.
+
+    Besides the plain values, a key may hold a lease (taken by a reader
+    on a miss, before going to the datastore) or a lock (taken by a
+    writer before committing). A reader only fills the cache if its
+    lease is still there, and locking or unlocking a key drops any
+    lease, so a read that raced with a write is never cached.
+    """
+
+    def __init__(self) -> 'None':
+        self.stats = CacheStats()
+
+    @abstractmethod
+    def get(self, key: 'bytes') -> 'Optional[bytes]':
+        ...
+
+    @abstractmethod
+    def lease(self, key: 'bytes', timeout: 'float'=LEASE_TIMEOUT) -> 'Optional[int]':
+        ...
+
+    @abstractmethod
+    def fill(self, key: 'bytes', token: 'int', value: 'Optional[bytes]') -> 'bool':
+        ...
+
+    @abstractmethod
+    def lock(self, keys: 'Iterable[bytes]', timeout: 'float'=LOCK_TIMEOUT) -> 'None':
+        ...
+
+    @abstractmethod
+    def unlock(self, keys: 'Iterable[bytes]') -> 'None':
+        ...
+
+    @abstractmethod
+    def clear(self) -> 'None':
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """Size bounded LRU store, with an optional TTL, for a single process."""
+
+    def __init__(
+        self,
+        max_size: 'int'=1024,
+        ttl: 'Optional[float]'=None,
+        clock: 'Callable[[], float]'=monotonic
+    ) -> 'None':
+        if max_size < 1:
+            raise ValueError("'max_size' must be greater than zero.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("'ttl' must be greater than zero.")
+
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        # key -> (state, expires at, value or token)
+        self._entries: 'OrderedDict[bytes, Tuple[int, float, Any]]' = OrderedDict()
+        self._lock = Lock()
+
+    def _entry(self, key: 'bytes') -> 'Optional[Tuple[int, float, Any]]':
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] <= self._clock():
+            del self._entries[key]
+            if entry[0] == _VALUE:
+                self.stats.expirations += 1
+            return None
+        return entry
+
+    def _put(self, key: 'bytes', entry: 'Tuple[int, float, Any]') -> 'None':
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get(self, key: 'bytes') -> 'Optional[bytes]':
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None or entry[0] != _VALUE:
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def lease(self, key: 'bytes', timeout: 'float'=LEASE_TIMEOUT) -> 'Optional[int]':
+        with self._lock:
+            if self._entry(key) is not None:
+                return None
+            token = _new_token()
+            self._put(key, (_LEASE, self._clock() + timeout, token))
+            return token
+
+    def fill(self, key: 'bytes', token: 'int', value: 'Optional[bytes]') -> 'bool':
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None or entry[0] != _LEASE or entry[2] != token:
+                return False
+
+            if value is None:
+                del self._entries[key]
+                return True
+
+            expires_at = (
+                float("inf") if self.ttl is None
+                else self._clock() + self.ttl
+            )
+            self._put(key, (_VALUE, expires_at, value))
+            return True
+
+    def lock(self, keys: 'Iterable[bytes]', timeout: 'float'=LOCK_TIMEOUT) -> 'None':
+        with self._lock:
+            expires_at = self._clock() + timeout
+            for key in keys:
+                self._put(key, (_LOCK, expires_at, None))
+
+    def unlock(self, keys: 'Iterable[bytes]') -> 'None':
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> 'None':
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> 'int':
+        return len(self._entries)
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<MemoryBackend - size: {len(self)}/{self.max_size}, "
+            f"ttl: {self.ttl}>"
+        )
+
+
+class SharedMemoryBackend(CacheBackend):
+    """Store in a memory mapped file, shared by the processes of a host.
+
+    The file is a fixed number of fixed size slots and each key goes to
+    a single slot (picked by its hash), evicting whatever was there.
+    Values that do not fit in a slot are not cached. The slots are only
+    read and written while holding an exclusive ``flock`` on the file,
+    which a forked process opens again to be excluded from its parent.
+    """
+
+    _MAGIC = b"NSQLCACH"
+    # magic, slots, slot size
+    _FILE_HEADER = struct.Struct("<8sII")
+    # key hash, state, expires at, token, key size, value size
+    _SLOT_HEADER = struct.Struct("<QBdQHI")
+
+    def __init__(
+        self,
+        path: 'str',
+        slots: 'int'=4096,
+        slot_size: 'int'=2048,
+        ttl: 'Optional[float]'=None
+    ) -> 'None':
+        import fcntl
+
+        if slots < 1:
+            raise ValueError("'slots' must be greater than zero.")
+        if slot_size <= self._SLOT_HEADER.size:
+            raise ValueError(
+                f"'slot_size' must be greater than {self._SLOT_HEADER.size}."
+            )
+        if ttl is not None and ttl <= 0:
+            raise ValueError("'ttl' must be greater than zero.")
+
+        super().__init__()
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.ttl = ttl
+        self._fcntl = fcntl
+        self._lock = Lock()
+
+        size = self._FILE_HEADER.size + slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._locked():
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, size)
+                os.pwrite(
+                    self._fd,
+                    self._FILE_HEADER.pack(self._MAGIC, slots, slot_size),
+                    0
+                )
+            header = self._FILE_HEADER.unpack(
+                os.pread(self._fd, self._FILE_HEADER.size, 0)
+            )
+
+        if header != (self._MAGIC, slots, slot_size):
+            os.close(self._fd)
+            raise ValueError((
+                f"'{path}' is not a cache file with {slots} slots "
+                f"of {slot_size} bytes."
+            ))
+
+        self._map = mmap.mmap(self._fd, size)
+        _shared_backends.add(self)
+
+    def _reopen(self) -> 'None':
+        # a forked process shares the open file (and so its 'flock')
+        # with its parent, which would not exclude one another.
+        if self._map.closed:
+            return
+        os.close(self._fd)
+        self._fd = os.open(self.path, os.O_RDWR)
+        self._lock = Lock()
+
+    @contextmanager
+    def _locked(self) -> 'Iterator[None]':
+        # the 'flock' only excludes the other processes,
+        # the threads of this one share the same file.
+        with self._lock:
+            self._fcntl.flock(self._fd, self._fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                self._fcntl.flock(self._fd, self._fcntl.LOCK_UN)
+
+    def _slot_of(self, key: 'bytes') -> 'Tuple[int, int]':
+        key_hash = int.from_bytes(blake2b(key, digest_size=8).digest(), "little")
+        offset = self._FILE_HEADER.size + (key_hash % self.slots) * self.slot_size
+        return key_hash, offset
+
+    def _read(self, offset: 'int') -> 'Tuple[int, int, float, int, bytes, int]':
+        key_hash, state, expires_at, token, key_size, value_size = (
+            self._SLOT_HEADER.unpack_from(self._map, offset)
+        )
+        start = offset + self._SLOT_HEADER.size
+        key = bytes(self._map[start:start + key_size])
+        return key_hash, state, expires_at, token, key, value_size
+
+    def _write(
+        self,
+        offset: 'int',
+        key_hash: 'int',
+        state: 'int',
+        expires_at: 'float',
+        token: 'int'=0,
+        key: 'bytes'=b"",
+        value: 'bytes'=b""
+    ) -> 'bool':
+        start = offset + self._SLOT_HEADER.size
+        if start + len(key) + len(value) > offset + self.slot_size:
+            return False
+
+        self._map[start:start + len(key) + len(value)] = key + value
+        self._SLOT_HEADER.pack_into(
+            self._map, offset,
+            key_hash, state, expires_at, token, len(key), len(value)
+        )
+        return True
+
+    def _entry(self, key: 'bytes') -> 'Tuple[int, int, Optional[Tuple]]':
+        # the current entry of the key's slot, whatever its key is
+        # ('None' for an empty or expired slot).
+        key_hash, offset = self._slot_of(key)
+        entry = self._read(offset)
+        state, expires_at = entry[1], entry[2]
+        if state == 0:
+            return key_hash, offset, None
+
+        if expires_at <= time():
+            self._write(offset, 0, 0, 0.0)
+            if state == _VALUE:
+                self.stats.expirations += 1
+            return key_hash, offset, None
+
+        return key_hash, offset, entry
+
+    def get(self, key: 'bytes') -> 'Optional[bytes]':
+        with self._locked():
+            _, offset, entry = self._entry(key)
+            if entry is None or entry[1] != _VALUE or entry[4] != key:
+                return None
+
+            start = offset + self._SLOT_HEADER.size + len(key)
+            return bytes(self._map[start:start + entry[5]])
+
+    def lease(self, key: 'bytes', timeout: 'float'=LEASE_TIMEOUT) -> 'Optional[int]':
+        with self._locked():
+            key_hash, offset, entry = self._entry(key)
+            if entry is not None:
+                state, entry_key = entry[1], entry[4]
+                # a lock protects its slot for any key (see 'lock').
+                if entry_key == key or state == _LOCK:
+                    return None
+                if state == _VALUE:
+                    self.stats.evictions += 1
+
+            token = _new_token()
+            self._write(offset, key_hash, _LEASE, time() + timeout, token, key)
+            return token
+
+    def fill(self, key: 'bytes', token: 'int', value: 'Optional[bytes]') -> 'bool':
+        with self._locked():
+            key_hash, offset, entry = self._entry(key)
+            if (
+                entry is None
+                or entry[1] != _LEASE
+                or entry[3] != token
+                or entry[4] != key
+            ):
+                return False
+
+            if value is not None:
+                expires_at = float("inf") if self.ttl is None else time() + self.ttl
+                if self._write(offset, key_hash, _VALUE, expires_at, 0, key, value):
+                    return True
+
+            # nothing to cache (or it does not fit), the lease is released.
+            self._write(offset, 0, 0, 0.0)
+            return value is None
+
+    def lock(self, keys: 'Iterable[bytes]', timeout: 'float'=LOCK_TIMEOUT) -> 'None':
+        with self._locked():
+            expires_at = time() + timeout
+            for key in keys:
+                key_hash, offset, entry = self._entry(key)
+                if entry is not None and entry[1] == _LOCK and entry[4] != key:
+                    # two keys locked in the same slot, the lock is kept for
+                    # both (no key) until the longest of them expires.
+                    self._write(offset, 0, _LOCK, max(expires_at, entry[2]))
+                    continue
+
+                if entry is not None and entry[1] == _VALUE and entry[4] != key:
+                    self.stats.evictions += 1
+                self._write(offset, key_hash, _LOCK, expires_at, 0, key)
+
+    def unlock(self, keys: 'Iterable[bytes]') -> 'None':
+        with self._locked():
+            for key in keys:
+                _, offset, entry = self._entry(key)
+                if entry is not None and entry[4] == key:
+                    self._write(offset, 0, 0, 0.0)
+
+    def clear(self) -> 'None':
+        with self._locked():
+            for index in range(self.slots):
+                self._write(
+                    self._FILE_HEADER.size + index * self.slot_size, 0, 0, 0.0
+                )
+
+    def close(self) -> 'None':
+        self._map.close()
+        os.close(self._fd)
+
+    def __len__(self) -> 'int':
+        with self._locked():
+            now = time()
+            return sum(
+                1 for index in range(self.slots)
+                if (entry:=self._read(
+                    self._FILE_HEADER.size + index * self.slot_size
+                ))[1] == _VALUE and entry[2] > now
+            )
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<SharedMemoryBackend - path: {self.path}, slots: {self.slots}, "
+            f"slot_size: {self.slot_size}, ttl: {self.ttl}>"
+        )
+
+
+class EntityCache:
+    """Read-through cache of datastore entities over a ``CacheBackend``.
+
+    The entities are kept as their serialized protobufs (the encoded
+    properties, exactly as the datastore returns them), so every read
+    decodes fresh values that are not shared with anyone else.
+    """
+
+    def __init__(self, backend: 'CacheBackend') -> 'None':
+        self.backend = backend
+
+    @property
+    def stats(self) -> 'CacheStats':
+        return self.backend.stats
+
+    @staticmethod
+    def _cache_key(g_key: 'GKey') -> 'bytes':
+        return g_key.to_protobuf()._pb.SerializeToString()
+
+    def get_multi(
+        self,
+        g_keys: 'List[GKey]',
+        fetch: 'Callable[[List[GKey]], List[Optional[GEntity]]]'
+    ) -> 'List[Optional[GEntity]]':
+        cache_keys = [self._cache_key(g_key) for g_key in g_keys]
+
+        results: 'List[Optional[GEntity]]' = []
+        missing: 'Dict[int, Optional[int]]' = {}
+        for index, cache_key in enumerate(cache_keys):
+            value = self.backend.get(cache_key)
+            if value is None:
+                self.stats.misses += 1
+                missing[index] = self.backend.lease(cache_key)
+                results.append(None)
+            else:
+                self.stats.hits += 1
+                results.append(load_entity(value))
+
+        if not missing:
+            return results
+
+        g_entities = fetch([g_keys[index] for index in missing])
+        for (index, token), g_entity in zip(missing.items(), g_entities):
+            results[index] = g_entity
+            if token is None:
+                continue
+
+            # the missing entities only release their leases,
+            # they may be created at any time.
+            self.backend.fill(
+                cache_keys[index],
+                token,
+                None if g_entity is None else dump_entity(g_entity)
+            )
+
+        return results
+
+    @contextmanager
+    def writing(self, g_keys: 'Iterable[GKey]') -> 'Iterator[None]':
+        # new entities (partial keys) can not be in the cache yet.
+        cache_keys = [
+            self._cache_key(g_key) for g_key in g_keys
+            if not g_key.is_partial
+        ]
+        self.backend.lock(cache_keys)
+        try:
+            yield
+        finally:
+            # even a failed commit may have been applied.
+            self.backend.unlock(cache_keys)
+
+    def clear(self) -> 'None':
+        self.backend.clear()
+
+    def __repr__(self) -> 'str':
+        return f"<EntityCache - backend: {self.backend!r}>"
+
+
+class QueryCache:
+    """Process-wide LRU cache of query results, grouped by kind.
+
+    The results are kept serialized (like in ``EntityCache``) under the
+    kind (project, namespace and kind) and the normalized query, each
+    entry with its own TTL. Every write of a kind invalidates all of its
+    queries, including the ones that were still being read.
+    """
+
+    def __init__(
+        self,
+        max_size: 'int'=256,
+        max_results: 'int'=1000,
+        clock: 'Callable[[], float]'=monotonic
+    ) -> 'None':
+        self.max_size = max_size
+        self.max_results = max_results
+        self.stats = CacheStats()
+        self._clock = clock
+        self._entries: 'OrderedDict[Tuple[Tuple, Hashable], Tuple[float, List[bytes]]]' = OrderedDict()
+        self._generations: 'Dict[Tuple, int]' = {}
+        self._lock = Lock()
+
+    def generation(self, kind_key: 'Tuple') -> 'int':
+        return self._generations.get(kind_key, 0)
+
+    def get(
+        self,
+        kind_key: 'Tuple',
+        query_key: 'Hashable'
+    ) -> 'Optional[List[GEntity]]':
+        key = (kind_key, query_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                self.stats.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+
+        return [load_entity(value) for value in entry[1]]
+
+    def set(
+        self,
+        kind_key: 'Tuple',
+        query_key: 'Hashable',
+        values: 'List[bytes]',
+        ttl: 'float',
+        generation: 'int'
+    ) -> 'bool':
+        if len(values) > self.max_results:
+            return False
+
+        with self._lock:
+            # the kind was written while the query was being read.
+            if self.generation(kind_key) != generation:
+                return False
+
+            key = (kind_key, query_key)
+            self._entries[key] = (self._clock() + ttl, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return True
+
+    def invalidate(self, kind_key: 'Tuple') -> 'None':
+        with self._lock:
+            self._generations[kind_key] = self.generation(kind_key) + 1
+            for key in [key for key in self._entries if key[0] == kind_key]:
+                del self._entries[key]
+
+    def clear(self) -> 'None':
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+    def __len__(self) -> 'int':
+        return len(self._entries)
+
+    def __repr__(self) -> 'str':
+        return f"<QueryCache - size: {len(self)}/{self.max_size}>"
+
+
+query_cache = QueryCache()
+
+
+def _reopen_shared_backends() -> 'None':
+    for backend in list(_shared_backends):
+        backend._reopen()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_shared_backends)
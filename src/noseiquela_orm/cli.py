@@ -0,0 +1,163 @@
+import argparse
+import gzip
+import io
+import sys
+from contextlib import contextmanager
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+from .export import DEFAULT_EXPORT_PAGE_SIZE, WRITERS
+from .utils.checkpoint import read_checkpoint, write_checkpoint
+
+if TYPE_CHECKING:
+    from typing import IO, Iterator, List, Optional, Tuple, Type
+
+    from .entity import Model
+
+
+def load_model(path: 'str') -> 'Type[Model]':
+    from .entity import Model
+
+    module_name, _, model_name = path.partition(":")
+    if not module_name or not model_name:
+        raise ValueError(f"'{path}' must be in the 'module:Model' format.")
+
+    model = getattr(import_module(module_name), model_name, None)
+    if not (isinstance(model, type) and issubclass(model, Model)):
+        raise ValueError(f"'{path}' is not a model.")
+
+    return model
+
+
+def _parse_checkpoint(value: 'Optional[str]') -> 'Tuple[Optional[str], Optional[int]]':
+    # the cursor of the next page, and the size the output had when
+    # it was saved (missing on the checkpoints of stdout).
+    if value is None:
+        return None, None
+
+    cursor, _, offset = value.partition("\n")
+    return cursor, (int(offset) if offset else None)
+
+
+@contextmanager
+def _open_output(
+    path: 'Optional[str]',
+    resume: 'bool',
+    offset: 'Optional[int]'
+) -> 'Iterator[IO[bytes]]':
+    if path is None or path == "-":
+        yield sys.stdout.buffer
+        return
+
+    if not resume:
+        with open(path, "wb") as output:
+            yield output
+        return
+
+    if offset is None:
+        with open(path, "ab") as output:
+            yield output
+        return
+
+    # whatever was written after the checkpoint (part of a page, or a
+    # gzip member without its trailer) is dropped before resuming.
+    with open(path, "r+b") as output:
+        output.truncate(offset)
+        output.seek(offset)
+        yield output
+
+
+def export_command(args: 'argparse.Namespace') -> 'int':
+    model = load_model(args.model)
+    start_cursor, offset = _parse_checkpoint(read_checkpoint(args.checkpoint))
+    compress = args.gzip or bool(args.output and args.output.endswith(".gz"))
+
+    # every page is written on its own (as a complete gzip member, when
+    # compressed), so the output is valid at each checkpoint and a resumed
+    # export just appends to it: gzip readers join the members.
+    page = io.StringIO(newline="")
+
+    with _open_output(
+        args.output,
+        resume=(start_cursor is not None),
+        offset=offset
+    ) as output:
+        def page_written(cursor: 'Optional[str]') -> 'None':
+            data = page.getvalue().encode("utf-8")
+            page.seek(0)
+            page.truncate()
+            if data:
+                output.write(gzip.compress(data) if compress else data)
+                output.flush()
+
+            if not args.checkpoint:
+                return
+            write_checkpoint(
+                args.checkpoint,
+                None if cursor is None
+                else f"{cursor}\n{output.tell()}" if output.seekable()
+                else cursor
+            )
+
+        exported = model.query.all(prefetch=args.prefetch).export( # type: ignore
+            page,
+            format=args.format,
+            fields=(args.fields.split(",") if args.fields else None),
+            page_size=args.page_size,
+            start_cursor=start_cursor,
+            checkpoint=page_written
+        )
+
+    print(f"{exported} entities exported.", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> 'argparse.ArgumentParser':
+    parser = argparse.ArgumentParser(prog="python -m noseiquela_orm")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="stream all the entities of a model to NDJSON or CSV."
+    )
+    export_parser.add_argument("model", help="model to export, as 'module:Model'.")
+    export_parser.add_argument(
+        "-o", "--output",
+        help="output file, stdout by default. '.gz' files are compressed."
+    )
+    export_parser.add_argument(
+        "-f", "--format",
+        choices=list(WRITERS),
+        default="ndjson"
+    )
+    export_parser.add_argument(
+        "--fields",
+        help="comma separated fields to export, all by default."
+    )
+    export_parser.add_argument("--gzip", action="store_true")
+    export_parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_EXPORT_PAGE_SIZE
+    )
+    export_parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        help="number of pages fetched ahead on a background thread."
+    )
+    export_parser.add_argument(
+        "--checkpoint",
+        help=(
+            "file holding the cursor of the last exported page, "
+            "an interrupted export resumes from it."
+        )
+    )
+    export_parser.set_defaults(func=export_command)
+
+    return parser
+
+
+def main(argv: 'Optional[List[str]]'=None) -> 'int':
+    args = build_parser().parse_args(argv)
+    return args.func(args)
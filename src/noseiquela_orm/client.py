@@ -1,17 +1,105 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from itertools import islice
+from threading import Lock
 from typing import TYPE_CHECKING
 from functools import partial
 
+from .batcher import Batcher
+from .utils.collections import chunked, merge_dicts
+
 if TYPE_CHECKING:
-    from typing import Callable, Dict, Optional, Union, List
+    from typing import (
+        Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional,
+        Tuple, TypeVar, Union, List
+    )
 
+    from google.cloud.datastore import Client as GClient
     from google.cloud.datastore.key import Key as GKey
     from google.cloud.datastore.entity import Entity as GEntity
+    from google.cloud.datastore.transaction import Transaction as GTransaction
     from google.auth.credentials import Credentials as GoogleCredentials
     from google.api_core.gapic_v1.client_info import ClientInfo as GoogleClientInfo
     from google.api_core.client_options import ClientOptions as GoogleClientOptions
     from google.api_core.retry import Retry as GoogleRetry
     from requests import Session as HttpSession
 
+    _Items = TypeVar("_Items")
+
+
+# https://cloud.google.com/datastore/docs/concepts/limits
+MAX_MUTATIONS_PER_COMMIT = 500
+# the API limit is 10MiB per commit, part of it is left to
+# the request overhead (keys, metadata...).
+MAX_COMMIT_SIZE = 9 * 1024 * 1024
+MAX_KEYS_PER_LOOKUP = 1000
+DEFAULT_MAX_WORKERS = 8
+# entities pulled from a query by each call of the async iteration.
+DEFAULT_ASYNC_BATCH_SIZE = 500
+
+
+def _estimate_entity_size(entity: 'GEntity') -> 'int':
+    from google.cloud.datastore.helpers import entity_to_protobuf
+
+    return entity_to_protobuf(entity)._pb.ByteSize()
+
+
+class ChunkResult:
+    def __init__(
+        self,
+        index: 'int',
+        items: 'List[Any]',
+        error: 'Optional[Exception]'=None
+    ) -> 'None':
+        self.index = index
+        self.items = items
+        self.error = error
+
+    @property
+    def ok(self) -> 'bool':
+        return self.error is None
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<ChunkResult - index: {self.index}, "
+            f"items: {len(self.items)}, ok: {self.ok}>"
+        )
+
+
+class BulkResult:
+    def __init__(self, chunks: 'List[ChunkResult]') -> 'None':
+        self.chunks = chunks
+
+    @property
+    def items(self) -> 'List[Any]':
+        return [
+            item
+            for chunk in self.chunks if chunk.ok
+            for item in chunk.items
+        ]
+
+    @property
+    def failures(self) -> 'List[ChunkResult]':
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def ok(self) -> 'bool':
+        return not self.failures
+
+    def __iter__(self) -> 'Iterator[Any]':
+        return iter(self.items)
+
+    def __len__(self) -> 'int':
+        return len(self.items)
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<BulkResult - chunks: {len(self.chunks)}, "
+            f"failures: {len(self.failures)}>"
+        )
+
 
 class DatastoreClient:
     def __init__(self,
@@ -23,20 +111,104 @@ class DatastoreClient:
         _http: 'Optional[HttpSession]'=None,
         _use_grpc: 'Optional[bool]'=None
     ) -> 'None':
-        from google.cloud.datastore import Client
-        from google.cloud.datastore.client import _CLIENT_INFO
-
         self._project = project
         self._namespace = namespace
-        self._client = Client(
-            project=project,
-            namespace=namespace,
-            credentials=credentials,
-            client_info=(client_info or _CLIENT_INFO),
-            client_options=client_options,
-            _http=_http,
-            _use_grpc=_use_grpc
-        )
+        self._client_args = {
+            "project": project,
+            "namespace": namespace,
+            "credentials": credentials,
+            "client_info": client_info,
+            "client_options": client_options,
+            "_http": _http,
+            "_use_grpc": _use_grpc,
+        }
+        self._google_client: 'Optional[GClient]' = None
+        self._async_client: 'Optional[AsyncDatastoreClient]' = None
+        self._save_batcher: 'Optional[Batcher]' = None
+        self._get_batcher: 'Optional[Batcher]' = None
+        self._lock = Lock()
+
+    @property
+    def _client(self) -> 'GClient':
+        # the google client (credentials lookup, transport...) is only
+        # created on the first real use, not when the models are defined.
+        if self._google_client is None:
+            with self._lock:
+                if self._google_client is None:
+                    from google.cloud.datastore import Client
+                    from google.cloud.datastore.client import _CLIENT_INFO
+
+                    self._google_client = Client(**merge_dicts(
+                        self._client_args,
+                        {"client_info": (
+                            self._client_args["client_info"] or _CLIENT_INFO
+                        )}
+                    ))
+        return self._google_client
+
+    @property
+    def aio(self) -> 'AsyncDatastoreClient':
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    self._async_client = AsyncDatastoreClient(self)
+        return self._async_client
+
+    @property
+    def save_batcher(self) -> 'Batcher':
+        # 'submit(entity)' gives a future of the entity key.
+        if self._save_batcher is None:
+            with self._lock:
+                if self._save_batcher is None:
+                    self._save_batcher = Batcher(
+                        self._save_batch,
+                        max_batch=MAX_MUTATIONS_PER_COMMIT,
+                        key_of=lambda entity: (
+                            None if entity.key.is_partial
+                            else entity.key.flat_path
+                        )
+                    )
+        return self._save_batcher
+
+    @property
+    def get_batcher(self) -> 'Batcher':
+        # 'submit(key)' gives a future of the entity ('None' if missing).
+        if self._get_batcher is None:
+            with self._lock:
+                if self._get_batcher is None:
+                    self._get_batcher = Batcher(
+                        self.get_multi,
+                        max_batch=MAX_KEYS_PER_LOOKUP,
+                        key_of=lambda key: key.flat_path
+                    )
+        return self._get_batcher
+
+    def _save_batch(self, entities: 'List[GEntity]') -> 'List[Any]':
+        from google.api_core.exceptions import InvalidArgument
+
+        result = self.bulk_save(entities, max_workers=1)
+
+        outcomes: 'Dict[int, Any]' = {}
+        for chunk in result.chunks:
+            if (
+                chunk.ok or len(chunk.items) == 1
+                or not isinstance(chunk.error, (InvalidArgument, ValueError))
+            ):
+                # transient errors (deadlines, unavailability...) are not
+                # about any entity in particular, and fail the whole batch.
+                for entity in chunk.items:
+                    outcomes[id(entity)] = entity.key if chunk.ok else chunk.error
+                continue
+
+            # a commit fails as a whole, so when one of its entities is
+            # invalid, they are saved one by one to find out which.
+            for entity in chunk.items:
+                try:
+                    outcomes[id(entity)] = self.save(entity).key
+                except Exception as error:
+                    outcomes[id(entity)] = error
+
+        return [outcomes[id(entity)] for entity in entities]
 
     def get_partial_query(self, kind: 'Union[str, int]') -> 'partial':
         return partial(
@@ -59,17 +231,130 @@ class DatastoreClient:
 
     def bulk_save(
         self,
-        entities: 'List[GEntity]',
+        entities: 'Iterable[GEntity]',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'BulkResult':
+        chunks = chunked(
+            entities,
+            max_items=MAX_MUTATIONS_PER_COMMIT,
+            max_size=MAX_COMMIT_SIZE,
+            size_of=_estimate_entity_size
+        )
+
+        def put_chunk(chunk: 'List[GEntity]') -> 'None':
+            self._client.put_multi(
+                entities=chunk,
+                retry=retry,
+                timeout=timeout
+            )
+
+        return self._dispatch(put_chunk, chunks, max_workers)
+
+    def allocate_ids(self, incomplete_key: 'GKey', num_ids: 'int') -> 'List[GKey]':
+        return self._client.allocate_ids(incomplete_key, num_ids)
+
+    def delete(
+        self,
+        key: 'GKey',
         retry: 'Optional[GoogleRetry]'=None,
         timeout: 'Optional[float]'=None
-    ) -> 'List[GEntity]':
-        self._client.put_multi(
-            entities=entities,
+    ) -> 'None':
+        self._client.delete_multi(
+            keys=[key],
             retry=retry,
             timeout=timeout
         )
 
-        return entities
+    def bulk_delete(
+        self,
+        keys: 'Iterable[GKey]',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'BulkResult':
+        def delete_chunk(chunk: 'List[GKey]') -> 'None':
+            self._client.delete_multi(
+                keys=chunk,
+                retry=retry,
+                timeout=timeout
+            )
+
+        return self._dispatch(
+            delete_chunk,
+            chunked(keys, max_items=MAX_MUTATIONS_PER_COMMIT),
+            max_workers
+        )
+
+    def get_multi(
+        self,
+        keys: 'Iterable[GKey]',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS,
+        transaction: 'Optional[GTransaction]'=None
+    ) -> 'List[Optional[GEntity]]':
+        keys = list(keys)
+        found: 'Dict[GKey, GEntity]' = {}
+        # the lookups run on other threads, so the transaction
+        # (if any) is given explicitly instead of being the current one.
+        lookup_kwargs = {} if transaction is None else {"transaction": transaction}
+
+        def lookup_chunk(chunk: 'List[GKey]') -> 'None':
+            pending = chunk
+            while pending:
+                deferred: 'List[GKey]' = []
+                for entity in self._client.get_multi(
+                    keys=pending,
+                    deferred=deferred,
+                    retry=retry,
+                    timeout=timeout,
+                    **lookup_kwargs
+                ):
+                    found[entity.key] = entity
+                pending = deferred
+
+        result = self._dispatch(
+            lookup_chunk,
+            chunked(keys, max_items=MAX_KEYS_PER_LOOKUP),
+            max_workers
+        )
+        if result.failures:
+            raise result.failures[0].error # type: ignore
+
+        return [found.get(key) for key in keys]
+
+    def transaction(self, read_only: 'bool'=False) -> 'GTransaction':
+        # not begun yet, and not pushed as the current batch of the
+        # google client (the ORM keeps track of it on its own).
+        return self._client.transaction(read_only=read_only)
+
+    @staticmethod
+    def _dispatch(
+        func: 'Callable[[List[Any]], Any]',
+        chunks: 'Iterable[List[Any]]',
+        max_workers: 'int'
+    ) -> 'BulkResult':
+        def run(index: 'int', chunk: 'List[Any]') -> 'ChunkResult':
+            try:
+                func(chunk)
+            except Exception as error:
+                return ChunkResult(index, chunk, error)
+            return ChunkResult(index, chunk)
+
+        chunks = list(chunks)
+        if len(chunks) <= 1 or max_workers <= 1:
+            return BulkResult([
+                run(index, chunk) for index, chunk in enumerate(chunks)
+            ])
+
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(chunks))
+        ) as executor:
+            return BulkResult(list(executor.map(
+                run, range(len(chunks)), chunks
+            )))
 
     def mount_partial_g_key(
         self,
@@ -99,3 +384,182 @@ class DatastoreClient:
     @property
     def namespace(self) -> 'str':
         return self._namespace or self._client.namespace
+
+
+class AsyncDatastoreClient:
+    """asyncio counterpart of a ``DatastoreClient``.
+
+    The google client only has blocking calls, so they run on a thread
+    pool owned by this client (with the context of the caller, so the
+    sessions still apply), and the event loop just awaits them. Many
+    calls may be in flight at once, up to ``max_workers``. Cancelling
+    the awaiting task releases it right away, the RPC already sent is
+    left to finish on its thread.
+    """
+
+    def __init__(
+        self,
+        client: 'DatastoreClient',
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'None':
+        self.client = client
+        self.max_workers = max_workers
+        self._executor: 'Optional[ThreadPoolExecutor]' = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> 'ThreadPoolExecutor':
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="noseiquela-aio"
+                    )
+        return self._executor
+
+    async def run(self, func: 'Callable[..., _Items]', *args, **kwargs) -> '_Items':
+        call = partial(copy_context().run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, call # type: ignore
+        )
+
+    async def save(
+        self,
+        entity: 'GEntity',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None
+    ) -> 'GEntity':
+        return await self.run(
+            self.client.save, entity, retry=retry, timeout=timeout
+        )
+
+    async def bulk_save(
+        self,
+        entities: 'Iterable[GEntity]',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'BulkResult':
+        return await self.run(
+            self.client.bulk_save,
+            entities,
+            retry=retry,
+            timeout=timeout,
+            max_workers=max_workers
+        )
+
+    async def get_multi(
+        self,
+        keys: 'Iterable[GKey]',
+        retry: 'Optional[GoogleRetry]'=None,
+        timeout: 'Optional[float]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'List[Optional[GEntity]]':
+        return await self.run(
+            self.client.get_multi,
+            keys,
+            retry=retry,
+            timeout=timeout,
+            max_workers=max_workers
+        )
+
+    async def iterate(
+        self,
+        items: 'Iterator[_Items]',
+        batch_size: 'int'=DEFAULT_ASYNC_BATCH_SIZE
+    ) -> 'AsyncIterator[_Items]':
+        # the blocking iterator is advanced on the pool a batch at a
+        # time, so the loop only waits when a batch is being read.
+        while True:
+            batch = await self.run(lambda: list(islice(items, batch_size)))
+            if not batch:
+                return
+            for item in batch:
+                yield item
+
+    def close(self) -> 'None':
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __repr__(self) -> 'str':
+        return f"<AsyncDatastoreClient - max_workers: {self.max_workers}>"
+
+
+class ClientPool:
+    """Process-wide registry of ``DatastoreClient`` instances.
+
+    Every set of client arguments (project, namespace, credentials,
+    client options and transport) maps to a single ``DatastoreClient``,
+    so all the models with an equivalent ``Meta`` share the same client.
+    The clients are only created when they are requested for the first
+    time.
+    """
+
+    def __init__(self) -> 'None':
+        self._clients: 'Dict[Tuple, DatastoreClient]' = {}
+        self._lock = Lock()
+        # bumped whenever a client is swapped or the pool is reset,
+        # so whoever caches a client knows it must ask again.
+        self.version = 0
+
+    @staticmethod
+    def _make_key(client_args: 'Dict[str, Any]') -> 'Tuple':
+        def _hashable(value: 'Any') -> 'Any':
+            # the dicts and lists (like 'client_options') are compared
+            # by value, any other unhashable object by its identity.
+            if isinstance(value, dict):
+                return ("__dict__", tuple(sorted(
+                    ((key, _hashable(item)) for key, item in value.items()),
+                    key=repr
+                )))
+            if isinstance(value, (list, tuple)):
+                return tuple(_hashable(item) for item in value)
+
+            try:
+                hash(value)
+            except TypeError:
+                return ("__id__", id(value))
+            return value
+
+        return tuple(
+            (arg, _hashable(value))
+            for arg, value in sorted(client_args.items())
+            if value is not None
+        )
+
+    def get(self, **client_args) -> 'DatastoreClient':
+        key = self._make_key(client_args)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = DatastoreClient(**client_args)
+                self._clients[key] = client
+        return client
+
+    def set(self, client: 'DatastoreClient', **client_args) -> 'None':
+        with self._lock:
+            self._clients[self._make_key(client_args)] = client
+            self.version += 1
+
+    def reset(self) -> 'None':
+        # a new lock too, the old one may have been held while forking.
+        self._lock = Lock()
+        self._clients = {}
+        self.version += 1
+
+    def __len__(self) -> 'int':
+        return len(self._clients)
+
+
+client_pool = ClientPool()
+
+if hasattr(os, "register_at_fork"):
+    # sockets and channels of the google clients must not be shared
+    # between the parent and the child processes.
+    os.register_at_fork(after_in_child=client_pool.reset)
@@ -0,0 +1,180 @@
+from array import array
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+    from google.cloud.datastore.entity import Entity as GEntity
+
+    from .entity import Model
+
+
+# numpy dtypes of the 'array' typecodes used by the typed columns.
+_NUMPY_DTYPES = {
+    "q": "int64",
+    "d": "float64",
+    "b": "bool",
+}
+_FILL_VALUES = {
+    "q": 0,
+    "d": 0.0,
+    "b": 0,
+}
+
+
+def _import_optional(module_name: 'str') -> 'Any':
+    from importlib import import_module
+
+    try:
+        return import_module(module_name)
+    except ImportError as error:
+        raise ImportError((
+            f"'{module_name}' is required for this conversion, "
+            f"install it with 'pip install {module_name}'."
+        )) from error
+
+
+class _ColumnBuffer:
+    def __init__(self, typecode: 'Optional[str]') -> 'None':
+        self.typecode = typecode
+        self.values: 'Union[array, List[Any]]' = (
+            [] if typecode is None else array(typecode)
+        )
+        # 1 where the value is missing ('None'), only for typed columns.
+        self.mask = bytearray()
+
+    def append(self, value: 'Any') -> 'None':
+        if self.typecode is None:
+            self.values.append(value)
+            return
+
+        if value is None:
+            self.values.append(_FILL_VALUES[self.typecode])
+            self.mask.append(1)
+            return
+
+        self.values.append(value)
+        self.mask.append(0)
+
+
+class Columns:
+    def __init__(self, buffers: 'Dict[str, _ColumnBuffer]', length: 'int') -> 'None':
+        self._buffers = buffers
+        self._length = length
+
+    @classmethod
+    def from_entities(
+        cls,
+        model: 'Type[Model]',
+        entities: 'Iterable[GEntity]',
+        fields: 'Optional[Iterable[str]]'=None
+    ) -> 'Columns':
+        fields, read_row = model._row_reader(fields)
+        buffers = {
+            field: _ColumnBuffer(getattr(model, field)._array_typecode)
+            for field in fields
+        }
+        ordered_buffers = list(buffers.values())
+
+        length = 0
+        for entity in entities:
+            for buffer, value in zip(ordered_buffers, read_row(entity)):
+                buffer.append(value)
+            length += 1
+
+        return cls(buffers, length)
+
+    @property
+    def fields(self) -> 'Tuple[str, ...]':
+        return tuple(self._buffers)
+
+    def __len__(self) -> 'int':
+        return self._length
+
+    def __contains__(self, field: 'str') -> 'bool':
+        return field in self._buffers
+
+    def __getitem__(self, field: 'str') -> 'Any':
+        return self.array(field)
+
+    def array(self, field: 'str') -> 'Any':
+        numpy = _import_optional("numpy")
+        buffer = self._buffers[field]
+
+        if buffer.typecode is None:
+            values = numpy.empty(len(buffer.values), dtype=object)
+            values[:] = buffer.values
+            return values
+
+        return numpy.frombuffer(
+            buffer.values, # type: ignore
+            dtype=("int8" if buffer.typecode == "b" else _NUMPY_DTYPES[buffer.typecode])
+        ).astype(_NUMPY_DTYPES[buffer.typecode])
+
+    def mask(self, field: 'str') -> 'Any':
+        numpy = _import_optional("numpy")
+        buffer = self._buffers[field]
+
+        if buffer.typecode is None:
+            return numpy.array(
+                [value is None for value in buffer.values],
+                dtype=bool
+            )
+        return numpy.frombuffer(buffer.mask, dtype="uint8").astype(bool)
+
+    def to_numpy(self) -> 'Any':
+        numpy = _import_optional("numpy")
+        dtype = [
+            (field, _NUMPY_DTYPES.get(buffer.typecode, object)) # type: ignore
+            for field, buffer in self._buffers.items()
+        ]
+
+        # missing values of the typed columns are filled with zeros,
+        # use 'mask(field)' to tell them apart.
+        result = numpy.empty(self._length, dtype=dtype)
+        for field in self._buffers:
+            result[field] = self.array(field)
+        return result
+
+    def to_pandas(self) -> 'Any':
+        pandas = _import_optional("pandas")
+        nullable_arrays = {
+            "q": pandas.arrays.IntegerArray,
+            "d": pandas.arrays.FloatingArray,
+            "b": pandas.arrays.BooleanArray,
+        }
+
+        data = {}
+        for field, buffer in self._buffers.items():
+            if buffer.typecode is None:
+                data[field] = self.array(field)
+                continue
+
+            data[field] = nullable_arrays[buffer.typecode](
+                self.array(field),
+                self.mask(field)
+            )
+        return pandas.DataFrame(data, columns=list(self._buffers))
+
+    def to_arrow(self) -> 'Any':
+        pyarrow = _import_optional("pyarrow")
+
+        arrays = [
+            pyarrow.array(
+                self._buffers[field].values
+                if self._buffers[field].typecode is None
+                else self.array(field),
+                mask=(
+                    None if self._buffers[field].typecode is None
+                    else self.mask(field)
+                )
+            )
+            for field in self._buffers
+        ]
+        return pyarrow.table(arrays, names=list(self._buffers))
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<Columns - fields: {', '.join(self.fields)}, "
+            f"rows: {self._length}>"
+        )
@@ -1,17 +1,64 @@
 import inspect
+from copy import deepcopy
+from contextlib import contextmanager, nullcontext
 from typing import TYPE_CHECKING
 
+from .cache import EntityCache, MemoryBackend, query_cache
+from .client import (
+    DEFAULT_MAX_WORKERS, MAX_MUTATIONS_PER_COMMIT, BulkResult, client_pool
+)
+from .importer import bulk_import
 from .query import Query
+from .session import current_session
+from .transaction import (
+    DEFAULT_RETRIES, Transaction, current_transaction, transactional
+)
+from .write_behind import WriteBehindQueue, write_behind_queue
 from .types.properties import BaseProperty
 from .utils.case_style import CaseStyle
 from .utils.collections import merge_dicts
 
 if TYPE_CHECKING:
-    from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+    from typing import (
+        Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional,
+        Set, Tuple, Union
+    )
 
     from google.cloud.datastore.entity import Entity as GEntity
     from google.cloud.datastore.key import Key as GKey
 
+    from .cache import CacheStats
+    from .client import DatastoreClient
+    from .importer import ImportReport
+
+
+_KEY_PROPS = ("id", "parent_id")
+_MISSING = object()
+
+
+class _PooledClient:
+    def __init__(self, client_args: 'Dict[str, Any]') -> 'None':
+        self._client_args = client_args
+        self._cached: 'Optional[Tuple[int, DatastoreClient]]' = None
+
+    def __get__(self, owner_instance, owner_class) -> 'DatastoreClient':
+        cached = self._cached
+        if cached is not None and cached[0] == client_pool.version:
+            return cached[1]
+
+        version = client_pool.version
+        client = client_pool.get(**self._client_args)
+        self._cached = (version, client)
+        return client
+
+
+class _ClientAttribute:
+    def __init__(self, attr_name: 'str') -> 'None':
+        self._attr_name = attr_name
+
+    def __get__(self, owner_instance, owner_class) -> 'Any':
+        return getattr(owner_class._client, self._attr_name)
+
 
 class ModelMeta(type):
     def __new__(cls, name: 'str', bases: 'Tuple', attrs: 'Dict'):
@@ -30,12 +77,17 @@ class ModelMeta(type):
             else cls.__get_client_args_from_meta(meta_class)
         )
 
-        from .client import DatastoreClient
-        ds_client = DatastoreClient(**ds_client_args)
-
-        attrs['_client'] = ds_client
-        attrs['project'] = ds_client.project
-        attrs['namespace'] = ds_client.namespace
+        attrs['_client'] = _PooledClient(ds_client_args)
+        attrs['_cache'] = (
+            None if meta_class is None
+            else cls.__get_cache_from_meta(meta_class)
+        )
+        attrs['_query_cache_ttl'] = getattr(meta_class, "query_cache_ttl", None)
+        attrs['_batch_saves'] = getattr(meta_class, "batch_saves", False)
+        attrs['_batch_gets'] = getattr(meta_class, "batch_gets", False)
+        attrs['_write_behind'] = cls.__get_write_behind_from_meta(meta_class)
+        attrs['project'] = _ClientAttribute("project")
+        attrs['namespace'] = _ClientAttribute("namespace")
 
         case_style = merge_dicts(
             {
@@ -46,8 +98,43 @@ class ModelMeta(type):
         )
 
         attrs['_case_style'] = CaseStyle(**case_style)
+        attrs['_validate_on_load'] = attrs.pop("__validate_on_load__", False)
+
+        compact = attrs.pop("__compact__", False)
+        slots = cls.__get_slots(attrs) if compact else {}
+        if compact:
+            attrs["__slots__"] = tuple(slots.values())
+
+        new_class = super().__new__(cls, name, bases, attrs)
+        setattr(new_class, "_compact", compact or any(
+            getattr(base, "_compact", False) for base in bases
+        ))
+
+        for prop_name, slot_name in slots.items():
+            getattr(new_class, prop_name)._slot = vars(new_class)[slot_name]
+
+        setattr(new_class, "_slot_members", {
+            prop_name: prop._slot
+            for prop_name in getattr(new_class, "_all_props", [])
+            if (prop:=getattr(new_class, prop_name))._slot is not None
+        })
 
-        return super().__new__(cls, name, bases, attrs)
+        return new_class
+
+    @staticmethod
+    def __get_slots(attrs: 'Dict') -> 'Dict[str, str]':
+        prop_names = [
+            attr_name for attr_name, attr in attrs.items()
+            if isinstance(attr, BaseProperty)
+        ]
+        # 'parent_id' is only created when the class is, by its 'id'.
+        if getattr(attrs["id"], "_parent", False):
+            prop_names.append("parent_id")
+
+        return {
+            prop_name: f"_slot_{prop_name}"
+            for prop_name in prop_names
+        }
 
     @classmethod
     def __get_client_args_from_meta(cls, meta_class: 'type') -> 'Dict[str, Any]':
@@ -68,11 +155,39 @@ class ModelMeta(type):
         }
 
 
+    @classmethod
+    def __get_write_behind_from_meta(
+        cls,
+        meta_class: 'Optional[type]'
+    ) -> 'Optional[WriteBehindQueue]':
+        write_behind = getattr(meta_class, "write_behind", None)
+        if isinstance(write_behind, WriteBehindQueue):
+            return write_behind
+        return write_behind_queue if write_behind else None
+
+    @classmethod
+    def __get_cache_from_meta(cls, meta_class: 'type') -> 'Optional[EntityCache]':
+        backend = getattr(meta_class, "cache_backend", None)
+        cache_size = getattr(meta_class, "cache_size", None)
+        if backend is None and cache_size is not None:
+            backend = MemoryBackend(
+                max_size=cache_size,
+                ttl=getattr(meta_class, "cache_ttl", None)
+            )
+
+        return None if backend is None else EntityCache(backend)
+
+
 class Model(metaclass=ModelMeta):
+    # the subclasses get their '__dict__' back unless they are compact,
+    # the change tracking is always kept out of it. both slots stay
+    # unset (or 'None') until there is something to track.
+    __slots__ = ("_snapshot", "_changed")
+
     _model_registry: 'Dict[str, Model]' = {}
 
     def __init__(self, **kwargs) -> None:
-        unmapped_props = set(kwargs.keys()) - set(self._all_props) # type: ignore
+        unmapped_props = kwargs.keys() - self._prop_names # type: ignore
 
         if unmapped_props:
             raise AttributeError((
@@ -110,22 +225,70 @@ class Model(metaclass=ModelMeta):
 
 
         setattr(cls, "_all_props", _all_props)
+        setattr(cls, "_prop_names", frozenset(_all_props))
         setattr(cls, "_default_props", _default_props)
         setattr(cls, "_required_props", _required_props)
-        setattr(cls, "query", Query(
-            partial_query=cls._client.get_partial_query(
-                kind=cls.kind
+        setattr(cls, "_has_parent", "parent_id" in _all_props)
+        cls._case_style.warm(_all_props) # type: ignore
+
+        # the codecs are compiled once here, so the read and write paths
+        # just loop over them with no name conversions per call.
+        entity_props = [
+            prop_name for prop_name in _all_props
+            if prop_name not in _KEY_PROPS
+        ]
+        setattr(cls, "_encoder", tuple(
+            (
+                prop_name,
+                cls._case_style(prop_name), # type: ignore
+                getattr(cls, prop_name)._to_datastore
             )
+            for prop_name in entity_props
         ))
+        setattr(cls, "_decoder", tuple(
+            (
+                prop_name,
+                cls._case_style(prop_name), # type: ignore
+                getattr(cls, prop_name)._from_datastore
+            )
+            for prop_name in entity_props
+        ))
+        setattr(cls, "_dict_props", tuple(
+            prop_name for prop_name in _KEY_PROPS
+            if prop_name in _all_props
+        ) + tuple(entity_props))
+        setattr(cls, "_snapshot_index", {
+            prop_name: index
+            for index, prop_name in enumerate(cls._dict_props) # type: ignore
+        })
+        setattr(cls, "query", Query())
 
     def __setattr__(self, key: 'str', value: 'Any') -> 'None':
-        if key not in self._all_props: # type: ignore
+        if key not in self._prop_names: # type: ignore
             raise AttributeError((
                 f"type object '{self.__class__.__name__}' "
                 f"has no attribute: {key}."
             ))
         super().__setattr__(key, value)
 
+    def __getstate__(self) -> 'Tuple[Dict[str, Any], Any, Any]':
+        # the change tracking (and the props of compact models) live in
+        # slots, which copy and pickle would restore through '__setattr__'
+        # (that only takes props).
+        changed = getattr(self, "_changed", None)
+        return (
+            dict(self._values()),
+            getattr(self, "_snapshot", None),
+            # changed in place, so a shallow copy needs its own.
+            None if changed is None else set(changed)
+        )
+
+    def __setstate__(self, state: 'Tuple[Dict[str, Any], Any, Any]') -> 'None':
+        values, snapshot, changed = state
+        object.__setattr__(self, "_snapshot", snapshot)
+        object.__setattr__(self, "_changed", changed)
+        self._update_values(values)
+
     def _mount_entity_g_key(self) -> 'GKey':
         has_parent = hasattr(self, "parent_id")
         if has_parent and not self.parent_id: # type: ignore
@@ -144,6 +307,211 @@ class Model(metaclass=ModelMeta):
             return self._partial_g_key(parent_key) # type: ignore
         return self._complete_g_key(self.id, parent_key) # type: ignore
 
+    @classmethod
+    def bulk_import(
+        cls,
+        rows: 'Union[str, Iterable[Dict[str, Any]]]',
+        format: 'Optional[str]'=None,
+        batch_size: 'int'=MAX_MUTATIONS_PER_COMMIT,
+        workers: 'int'=DEFAULT_MAX_WORKERS,
+        dead_letter: 'Optional[str]'=None,
+        checkpoint: 'Optional[str]'=None
+    ) -> 'ImportReport':
+        return bulk_import(
+            cls,
+            rows,
+            format=format,
+            batch_size=batch_size,
+            workers=workers,
+            dead_letter=dead_letter,
+            checkpoint=checkpoint
+        )
+
+    @classmethod
+    def _mount_g_key_from_ids(
+        cls,
+        id_or_name: 'Union[str, int]',
+        parent_id: 'Optional[Union[str, int]]'=None
+    ) -> 'GKey':
+        has_parent = hasattr(cls, "parent_id")
+        if parent_id is not None and not has_parent:
+            raise ValueError((
+                f"type object '{cls.__name__}' has no parent, "
+                "'parent_id' must not be set."
+            ))
+
+        if has_parent and not parent_id:
+            raise ValueError((
+                "'parent_id' must be a valid 'str' or 'int' "
+                "to mount the key."
+            ))
+
+        parent_key = (
+            cls._parent_complete_g_key(parent_id) # type: ignore
+            if has_parent
+            else None
+        )
+        return cls._complete_g_key(id_or_name, parent_key) # type: ignore
+
+    @classmethod
+    def get(
+        cls,
+        id_or_name: 'Union[str, int]',
+        parent_id: 'Optional[Union[str, int]]'=None
+    ) -> 'Optional[Model]':
+        return cls.get_multi([id_or_name], parent_id=parent_id)[0]
+
+    @classmethod
+    def get_multi(
+        cls,
+        ids: 'Iterable[Union[str, int, Tuple[Union[str, int], Union[str, int]]]]',
+        parent_id: 'Optional[Union[str, int]]'=None
+    ) -> 'List[Optional[Model]]':
+        # for models with a parent, each id can also be
+        # a '(parent_id, id)' tuple.
+        g_keys = [
+            cls._mount_g_key_from_ids(item[1], item[0])
+            if isinstance(item, tuple)
+            else cls._mount_g_key_from_ids(item, parent_id)
+            for item in ids
+        ]
+
+        # the lookups of a transaction always read from it.
+        transaction = current_transaction(cls._client) # type: ignore
+        if transaction is not None:
+            return [
+                None if g_entity is None
+                else cls._mount_from_google_entity(g_entity, use_session=False)
+                for g_entity in transaction.get_multi(g_keys)
+            ]
+
+        # the entities already loaded in the session are not fetched again.
+        session = current_session()
+        results: 'List[Optional[Model]]' = [
+            None if session is None else session.get(g_key)
+            for g_key in g_keys
+        ]
+        missing = [
+            index for index, instance in enumerate(results)
+            if instance is None
+        ]
+        if not missing:
+            return results
+
+        missing_keys = [g_keys[index] for index in missing]
+        fetch = cls._batched_get_multi if cls._batch_gets else cls._client.get_multi # type: ignore
+        g_entities = (
+            fetch(missing_keys)
+            if cls._cache is None # type: ignore
+            else cls._cache.get_multi(missing_keys, fetch) # type: ignore
+        )
+
+        for index, g_entity in zip(missing, g_entities):
+            if g_entity is not None:
+                results[index] = cls._mount_from_google_entity(g_entity)
+        return results
+
+    @classmethod
+    def _batched_get_multi(cls, g_keys: 'List[GKey]') -> 'List[Optional[GEntity]]':
+        # the keys join the lookups of the other callers.
+        batcher = cls._client.get_batcher # type: ignore
+        futures = [batcher.submit(g_key) for g_key in g_keys]
+        return [future.result() for future in futures]
+
+    @classmethod
+    async def aget(
+        cls,
+        id_or_name: 'Union[str, int]',
+        parent_id: 'Optional[Union[str, int]]'=None
+    ) -> 'Optional[Model]':
+        return (await cls.aget_multi([id_or_name], parent_id=parent_id))[0]
+
+    @classmethod
+    async def aget_multi(
+        cls,
+        ids: 'Iterable[Union[str, int, Tuple[Union[str, int], Union[str, int]]]]',
+        parent_id: 'Optional[Union[str, int]]'=None
+    ) -> 'List[Optional[Model]]':
+        return await cls._client.aio.run( # type: ignore
+            cls.get_multi, list(ids), parent_id=parent_id
+        )
+
+    @classmethod
+    def delete_multi(
+        cls,
+        ids: 'Iterable[Union[str, int, Tuple[Union[str, int], Union[str, int]]]]',
+        parent_id: 'Optional[Union[str, int]]'=None,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'int':
+        g_keys = [
+            cls._mount_g_key_from_ids(item[1], item[0])
+            if isinstance(item, tuple)
+            else cls._mount_g_key_from_ids(item, parent_id)
+            for item in ids
+        ]
+        return cls._delete_g_keys(g_keys, max_workers=max_workers)
+
+    @classmethod
+    def _delete_g_keys(
+        cls,
+        g_keys: 'List[GKey]',
+        max_workers: 'int'=DEFAULT_MAX_WORKERS
+    ) -> 'int':
+        # the deletes of a transaction are only sent on its commit.
+        transaction = current_transaction(cls._client) # type: ignore
+        if transaction is not None:
+            for g_key in g_keys:
+                transaction.delete(cls, g_key)
+            return len(g_keys)
+
+        with cls._cache_writing(g_keys):
+            result = cls._client.bulk_delete( # type: ignore
+                g_keys,
+                max_workers=max_workers
+            )
+
+        # deletes are not deferred by the session, it just
+        # stops handing out (and saving) the deleted instances.
+        session = current_session()
+        if session is not None:
+            for g_key in result.items:
+                session.discard(g_key)
+
+        if not result.ok:
+            raise result.failures[0].error # type: ignore
+        return len(result)
+
+    @classmethod
+    def transaction(cls, read_only: 'bool'=False) -> 'Transaction':
+        return Transaction(cls._client, read_only=read_only) # type: ignore
+
+    @classmethod
+    def transactional(
+        cls,
+        retries: 'int'=DEFAULT_RETRIES,
+        read_only: 'bool'=False
+    ) -> 'Callable[[Callable[..., Any]], Callable[..., Any]]':
+        return transactional(cls, retries=retries, read_only=read_only)
+
+    @classmethod
+    def cache_stats(cls) -> 'Optional[CacheStats]':
+        return None if cls._cache is None else cls._cache.stats # type: ignore
+
+    @classmethod
+    @contextmanager
+    def _cache_writing(cls, g_keys: 'Iterable[GKey]') -> 'Iterator[None]':
+        # the keys stay locked in the cache while they are written,
+        # and every cached query of the kind is dropped afterwards.
+        locked = (
+            nullcontext() if cls._cache is None # type: ignore
+            else cls._cache.writing(g_keys) # type: ignore
+        )
+        try:
+            with locked:
+                yield
+        finally:
+            query_cache.invalidate((cls.project, cls.namespace, cls.kind)) # type: ignore
+
     @classmethod
     def _generate_default_dict(cls) -> 'Dict[str, Any]':
         return {
@@ -152,66 +520,371 @@ class Model(metaclass=ModelMeta):
         }
 
     @classmethod
-    def _mount_from_google_entity(cls, entity: 'GEntity') -> 'Model':
-        data = merge_dicts(
-            cls._generate_default_dict(),
-            {"id": entity.key.id_or_name}
-        )
+    def _mount_from_google_entity(
+        cls,
+        entity: 'GEntity',
+        validate: 'Optional[bool]'=None,
+        use_session: 'bool'=True
+    ) -> 'Model':
+        session = current_session() if use_session else None
+        if session is None:
+            return cls._mount_from_values(cls._entity_values(entity), validate)
+
+        instance = session.get(entity.key)
+        if instance is not None:
+            return instance
+
+        instance = cls._mount_from_values(cls._entity_values(entity), validate)
+        return session.add(instance, entity.key)
 
-        if hasattr(cls, "parent_id") and entity.key.parent:
-            data["parent_id"] = entity.key.parent.id_or_name
+    @classmethod
+    def _mount_from_values(
+        cls,
+        data: 'Dict[str, Any]',
+        validate: 'Optional[bool]'=None
+    ) -> 'Model':
+        if validate is None:
+            validate = cls._validate_on_load # type: ignore
+
+        if validate:
+            instance = cls(**{
+                prop_name: value
+                for prop_name, value in data.items()
+                if prop_name != "parent_id" or value is not None
+            })
+        else:
+            # the data comes from the datastore itself, so the decoded values
+            # are written straight into the instance, skipping the validations.
+            instance = cls.__new__(cls)
+            instance._update_values(data)
+
+        instance._take_snapshot(data)
+        return instance
 
-        props_to_mount = [
-            prop for prop in cls._all_props # type: ignore
-            if prop not in ["id"]
-        ]
+    @classmethod
+    def _entity_values(cls, entity: 'GEntity') -> 'Dict[str, Any]':
+        data = cls._decode_entity(entity)
+        data["id"] = entity.key.id_or_name
+
+        if cls._has_parent: # type: ignore
+            data["parent_id"] = (
+                entity.key.parent.id_or_name
+                if entity.key.parent
+                else None
+            )
 
-        for property in props_to_mount:
-            data[property] = entity.get(
-                cls._case_style.revert(property) # type: ignore
+        return data
+
+    @classmethod
+    def _decode_entity(cls, entity: 'GEntity') -> 'Dict[str, Any]':
+        data = {}
+        get_value = entity.get
+        for prop_name, datastore_name, decode in cls._decoder: # type: ignore
+            value = get_value(datastore_name)
+            data[prop_name] = (
+                value if (decode is None or value is None)
+                else decode(value)
             )
-        return cls(**data)
+        return data
 
-    def as_dict(self) -> 'Dict[str, Any]':
-        has_parent = hasattr(self, "parent_id")
-        base_dict = {
-            "id": None,
-            "parent_id": None,
-        } if has_parent else {"id": None}
+    @classmethod
+    def _row_reader(
+        cls,
+        fields: 'Optional[Iterable[str]]'=None
+    ) -> 'Tuple[Tuple[str, ...], Callable[[GEntity], List[Any]]]':
+        # reads the decoded values of the fields straight from the
+        # entities, for the exports that do not need a model per entity.
+        fields = tuple(cls._dict_props if fields is None else fields) # type: ignore
+        unknown_fields = set(fields) - cls._prop_names # type: ignore
+        if unknown_fields:
+            raise AttributeError((
+                f"type object '{cls.__name__}' "
+                f"has no attributes: {', '.join(unknown_fields)}."
+            ))
 
-        return merge_dicts(
-            base_dict,
-            {
-                prop_name: value
-                for prop_name, value in vars(self).items()
-                if prop_name in self._all_props # type: ignore
-            }
-        )
+        decoders = {
+            prop_name: (datastore_name, decode)
+            for prop_name, datastore_name, decode in cls._decoder # type: ignore
+        }
+        readers = [
+            (field, *decoders.get(field, (None, None)))
+            for field in fields
+        ]
 
-    def as_entity(self) -> 'GEntity':
-        data = self.as_dict()
+        def read_row(entity: 'GEntity') -> 'List[Any]':
+            key = entity.key
+            row = []
+            for field, datastore_name, decode in readers:
+                if field == "id":
+                    value = key.id_or_name
+                elif field == "parent_id":
+                    value = key.parent.id_or_name if key.parent else None
+                else:
+                    value = entity.get(datastore_name)
+                    if decode is not None and value is not None:
+                        value = decode(value)
+                row.append(value)
+            return row
+
+        return fields, read_row
+
+    def _values(self) -> 'Dict[str, Any]':
+        if not self._compact: # type: ignore
+            return vars(self)
+
+        # subclasses of compact models may still keep
+        # some of their props in a '__dict__'.
+        values = dict(getattr(self, "__dict__", {}))
+        for prop_name, slot in self._slot_members.items(): # type: ignore
+            try:
+                values[prop_name] = slot.__get__(self)
+            except AttributeError:
+                continue
+        return values
+
+    def _update_values(self, values: 'Dict[str, Any]') -> 'None':
+        if not self._compact: # type: ignore
+            vars(self).update(values)
+            return
+
+        slot_members = self._slot_members # type: ignore
+        for prop_name, value in values.items():
+            if prop_name in slot_members:
+                slot_members[prop_name].__set__(self, value)
+            else:
+                self.__dict__[prop_name] = value
+
+    def _take_snapshot(self, values: 'Optional[Dict[str, Any]]'=None) -> 'None':
+        # a tuple in the order of '_dict_props' (much smaller than a dict),
+        # the containers are copied, they may be changed in place.
+        if values is None:
+            values = self._values()
+        object.__setattr__(self, "_snapshot", tuple(
+            deepcopy(value) if isinstance(value, (list, dict)) else value
+            for value in (
+                values.get(prop_name, _MISSING)
+                for prop_name in self._dict_props # type: ignore
+            )
+        ))
+        object.__setattr__(self, "_changed", None)
+
+    def _mark_changed(self, prop_name: 'str', value: 'Any') -> 'None':
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is None:
+            return
+
+        changed = self._changed # type: ignore
+        if snapshot[self._snapshot_index[prop_name]] == value: # type: ignore
+            if changed:
+                changed.discard(prop_name)
+            return
+
+        if changed is None:
+            changed = set()
+            object.__setattr__(self, "_changed", changed)
+        changed.add(prop_name)
+
+    @property
+    def changed_fields(self) -> 'FrozenSet[str]':
+        values = self._values()
+        snapshot = getattr(self, "_snapshot", None)
+        if snapshot is None:
+            return frozenset(values)
+
+        changed: 'Set[str]' = set(self._changed or ()) # type: ignore
+        for prop_name, value in zip(self._dict_props, snapshot): # type: ignore
+            if isinstance(value, (list, dict)) and values.get(prop_name) != value:
+                changed.add(prop_name)
+        return frozenset(changed)
+
+    @property
+    def is_dirty(self) -> 'bool':
+        return getattr(self, "_snapshot", None) is None or bool(self.changed_fields)
 
-        _ = data.pop("id", None)
-        _ = data.pop("parent_id", None)
+    def as_dict(self) -> 'Dict[str, Any]':
+        # the key props are always present, the other ones
+        # only when they were set on the instance.
+        data = self._values()
+        return {
+            prop_name: data.get(prop_name)
+            for prop_name in self._dict_props # type: ignore
+            if prop_name in data or prop_name in _KEY_PROPS
+        }
 
+    def as_entity(self) -> 'GEntity':
         from google.cloud.datastore.entity import Entity
         entity = Entity(key=self._mount_entity_g_key())
 
-        entity.update({
-            self._case_style(prop_name): value # type: ignore
-            for prop_name, value in data.items()
-        })
+        data = self._values()
+        for prop_name, datastore_name, encode in self._encoder: # type: ignore
+            if prop_name not in data:
+                continue
+
+            value = data[prop_name]
+            entity[datastore_name] = (
+                value if (encode is None or value is None)
+                else encode(value)
+            )
 
         return entity
 
-    def save(self) -> 'None':
+    @classmethod
+    def _allocate_g_keys(cls, g_entities: 'List[GEntity]') -> 'None':
+        # the partial keys sharing kind and parent are completed together.
+        by_path: 'Dict[Tuple, List[GEntity]]' = {}
+        for g_entity in g_entities:
+            if g_entity.key.is_partial:
+                by_path.setdefault(g_entity.key.flat_path, []).append(g_entity)
+
+        for group in by_path.values():
+            g_keys = cls._client.allocate_ids(group[0].key, len(group)) # type: ignore
+            for g_entity, g_key in zip(group, g_keys):
+                g_entity.key = g_key
+
+    @classmethod
+    def _deferred_queue(cls, deferred: 'Optional[bool]') -> 'Optional[WriteBehindQueue]':
+        if deferred is None:
+            return cls._write_behind # type: ignore
+        return (cls._write_behind or write_behind_queue) if deferred else None # type: ignore
+
+    @classmethod
+    def flush_writes(cls) -> 'None':
+        # waits for the deferred saves of the model (and the others
+        # sharing its queue) to be written.
+        cls._deferred_queue(True).flush() # type: ignore
+
+    def save(self, force: 'bool'=False, deferred: 'Optional[bool]'=None) -> 'None':
+        # nothing changed since it was loaded (or saved), nothing to write.
+        if not (force or self.is_dirty):
+            return
+
+        # inside a transaction (or a session), the instance
+        # is only committed when it ends.
+        transaction = current_transaction(self._client) # type: ignore
+        if transaction is not None:
+            transaction.save(self)
+            return
+
+        session = current_session()
+        if session is not None:
+            session.save(self)
+            return
+
         g_entity = self.as_entity()
 
-        g_entity = self._client.save( # type: ignore
-            entity=g_entity
-        )
+        # the deferred saves are written in the background, with the
+        # ids of the new entities allocated before they are queued.
+        queue = self._deferred_queue(deferred)
+        if queue is not None:
+            self._allocate_g_keys([g_entity])
+            queue.put(type(self), g_entity)
+            self.id = g_entity.key.id
+            self._take_snapshot()
+            return
+
+        with self._cache_writing([g_entity.key]):
+            if self._batch_saves: # type: ignore
+                # the key is completed in place, like in a single save.
+                self._client.save_batcher.submit(g_entity).result() # type: ignore
+            else:
+                g_entity = self._client.save( # type: ignore
+                    entity=g_entity
+                )
 
         self.id = g_entity.key.id
+        self._take_snapshot()
+
+    def delete(self) -> 'int':
+        if self.id is None:
+            raise ValueError("'id' must be set to delete the entity.")
+
+        deleted = self._delete_g_keys([self._mount_entity_g_key()], max_workers=1)
+
+        # nothing is stored anymore, a later save writes it all again.
+        object.__setattr__(self, "_snapshot", None)
+        object.__setattr__(self, "_changed", None)
+        return deleted
+
+    async def asave(self, force: 'bool'=False, deferred: 'Optional[bool]'=None) -> 'None':
+        await self._client.aio.run(self.save, force=force, deferred=deferred) # type: ignore
+
+    @classmethod
+    def save_multi(
+        cls,
+        instances: 'Iterable[Model]',
+        max_workers: 'int'=DEFAULT_MAX_WORKERS,
+        force: 'bool'=False,
+        deferred: 'Optional[bool]'=None
+    ) -> 'BulkResult':
+        instances = list(instances)
+        for instance in instances:
+            if not isinstance(instance, cls):
+                raise ValueError((
+                    f"'{instance!r}' is not an instance of "
+                    f"'{cls.__name__}'."
+                ))
+
+        if not force:
+            instances = [instance for instance in instances if instance.is_dirty]
+
+        transaction = current_transaction(cls._client) # type: ignore
+        if transaction is not None:
+            for instance in instances:
+                transaction.save(instance)
+            return BulkResult([])
+
+        session = current_session()
+        if session is not None:
+            for instance in instances:
+                session.save(instance)
+            return BulkResult([])
+
+        g_entities = [instance.as_entity() for instance in instances]
+
+        queue = cls._deferred_queue(deferred)
+        if queue is not None:
+            cls._allocate_g_keys(g_entities)
+            for instance, g_entity in zip(instances, g_entities):
+                queue.put(cls, g_entity)
+                instance.id = g_entity.key.id_or_name
+                instance._take_snapshot()
+            return BulkResult([])
+
+        instance_by_entity = {
+            id(g_entity): instance
+            for g_entity, instance in zip(g_entities, instances)
+        }
+
+        with cls._cache_writing(g_entity.key for g_entity in g_entities):
+            result = cls._client.bulk_save( # type: ignore
+                entities=g_entities,
+                max_workers=max_workers
+            )
+
+        # the keys allocated by the datastore are only
+        # written back for the chunks that were committed.
+        for g_entity in result.items:
+            instance = instance_by_entity[id(g_entity)]
+            instance.id = g_entity.key.id_or_name
+            instance._take_snapshot()
+
+        return result
+
+    @classmethod
+    async def asave_multi(
+        cls,
+        instances: 'Iterable[Model]',
+        max_workers: 'int'=DEFAULT_MAX_WORKERS,
+        force: 'bool'=False,
+        deferred: 'Optional[bool]'=None
+    ) -> 'BulkResult':
+        return await cls._client.aio.run( # type: ignore
+            cls.save_multi,
+            list(instances),
+            max_workers=max_workers,
+            force=force,
+            deferred=deferred
+        )
 
     def __repr__(self) -> 'str':
         return (
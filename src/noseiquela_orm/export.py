@@ -0,0 +1,100 @@
+import csv
+import json
+from abc import ABC, abstractmethod
+from base64 import b64encode
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import IO, Any, Dict, Iterable, Optional, Type
+
+    from google.cloud.datastore.entity import Entity as GEntity
+
+    from .entity import Model
+
+
+DEFAULT_EXPORT_PAGE_SIZE = 500
+
+
+def _export_value(value: 'Any') -> 'Any':
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+
+    if isinstance(value, bytes):
+        return b64encode(value).decode("ascii")
+
+    if isinstance(value, dict):
+        return {key: _export_value(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple, set)):
+        return [_export_value(item) for item in value]
+
+    return value
+
+
+class _Writer(ABC):
+    def __init__(
+        self,
+        fp: 'IO[str]',
+        model: 'Type[Model]',
+        fields: 'Optional[Iterable[str]]'=None,
+        write_header: 'bool'=True
+    ) -> 'None':
+        self.fp = fp
+        self.fields, self._read_row = model._row_reader(fields)
+        self.write_header = write_header
+
+    def _row(self, entity: 'GEntity') -> 'Dict[str, Any]':
+        return {
+            field: _export_value(value)
+            for field, value in zip(self.fields, self._read_row(entity))
+        }
+
+    @abstractmethod
+    def write(self, entities: 'Iterable[GEntity]') -> 'None':
+        ...
+
+
+class NDJSONWriter(_Writer):
+    def write(self, entities: 'Iterable[GEntity]') -> 'None':
+        self.fp.writelines(
+            json.dumps(self._row(entity), ensure_ascii=False) + "\n"
+            for entity in entities
+        )
+
+
+class CSVWriter(_Writer):
+    def __init__(self, *args, **kwargs) -> 'None':
+        super().__init__(*args, **kwargs)
+        self._csv_writer = csv.DictWriter(self.fp, fieldnames=self.fields)
+
+    def write(self, entities: 'Iterable[GEntity]') -> 'None':
+        if self.write_header:
+            self._csv_writer.writeheader()
+            self.write_header = False
+
+        for entity in entities:
+            # nested values have no csv representation, so they go as json.
+            self._csv_writer.writerow({
+                field: (
+                    json.dumps(value, ensure_ascii=False)
+                    if isinstance(value, (dict, list))
+                    else value
+                )
+                for field, value in self._row(entity).items()
+            })
+
+
+WRITERS = {
+    "ndjson": NDJSONWriter,
+    "csv": CSVWriter,
+}
+
+
+def get_writer(format: 'str', fp: 'IO[str]', model: 'Type[Model]', **kwargs) -> '_Writer':
+    if format not in WRITERS:
+        raise ValueError((
+            f"'{format}' is not a valid format "
+            f"({', '.join(WRITERS)})."
+        ))
+    return WRITERS[format](fp, model, **kwargs)
@@ -0,0 +1,209 @@
+import csv
+import gzip
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from .client import DEFAULT_MAX_WORKERS, MAX_MUTATIONS_PER_COMMIT
+from .utils.checkpoint import read_checkpoint, write_checkpoint
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import (
+        IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Type,
+        Union
+    )
+
+    from google.cloud.datastore.entity import Entity as GEntity
+
+    from .client import BulkResult
+    from .entity import Model
+
+
+FORMATS = ("ndjson", "csv")
+
+
+class RejectedRow:
+    def __init__(self, line: 'int', row: 'Any', error: 'Exception') -> 'None':
+        self.line = line
+        self.row = row
+        self.error = error
+
+    def as_dict(self) -> 'Dict[str, Any]':
+        return {
+            "line": self.line,
+            "row": self.row,
+            "error": f"{self.error.__class__.__name__}: {self.error}",
+        }
+
+    def __repr__(self) -> 'str':
+        return f"<RejectedRow - line: {self.line}, error: {self.error!r}>"
+
+
+class ImportReport:
+    def __init__(self) -> 'None':
+        self.imported = 0
+        self.skipped = 0
+        self.last_line = 0
+        self.rejected: 'List[RejectedRow]' = []
+
+    @property
+    def ok(self) -> 'bool':
+        return not self.rejected
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<ImportReport - imported: {self.imported}, "
+            f"rejected: {len(self.rejected)}, skipped: {self.skipped}>"
+        )
+
+
+def _open_text(path: 'str', mode: 'str') -> 'IO[str]':
+    if path.endswith(".gz"):
+        return gzip.open(path, f"{mode}t", encoding="utf-8", newline="") # type: ignore
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _guess_format(path: 'str') -> 'str':
+    name = path[:-3] if path.endswith(".gz") else path
+    return "csv" if name.endswith(".csv") else "ndjson"
+
+
+def read_rows(
+    path: 'str',
+    format: 'Optional[str]'=None
+) -> 'Iterator[Tuple[int, Dict[str, Any]]]':
+    format = format or _guess_format(path)
+    if format not in FORMATS:
+        raise ValueError(f"'{format}' is not a valid format ({', '.join(FORMATS)}).")
+
+    with _open_text(path, "r") as input_file:
+        if format == "csv":
+            # the header is the line 1.
+            for line, row in enumerate(csv.DictReader(input_file), start=2):
+                yield line, row
+            return
+
+        for line, raw_row in enumerate(input_file, start=1):
+            if raw_row.strip():
+                yield line, json.loads(raw_row)
+
+
+def _from_text(model: 'Type[Model]', row: 'Dict[str, Any]') -> 'Dict[str, Any]':
+    # csv cells are always strings, they are converted with the
+    # property types before going through the validations.
+    data = {}
+    for prop_name, value in row.items():
+        prop = getattr(model, prop_name, None)
+        from_text = getattr(prop, "_from_text", None)
+        if value == "":
+            value = None
+        elif isinstance(value, str) and from_text is not None:
+            value = from_text(value)
+        data[prop_name] = value
+    return data
+
+
+def bulk_import(
+    model: 'Type[Model]',
+    rows: 'Union[str, Iterable[Dict[str, Any]]]',
+    format: 'Optional[str]'=None,
+    batch_size: 'int'=MAX_MUTATIONS_PER_COMMIT,
+    workers: 'int'=DEFAULT_MAX_WORKERS,
+    dead_letter: 'Optional[str]'=None,
+    checkpoint: 'Optional[str]'=None
+) -> 'ImportReport':
+    if batch_size < 1 or workers < 1:
+        raise ValueError("'batch_size' and 'workers' must be greater than zero.")
+
+    numbered_rows: 'Iterable[Tuple[int, Dict[str, Any]]]' = (
+        read_rows(rows, format=format)
+        if isinstance(rows, str)
+        else enumerate(rows, start=1)
+    )
+    from_text = isinstance(rows, str) and (format or _guess_format(rows)) == "csv"
+
+    resume_after = int(read_checkpoint(checkpoint) or 0)
+
+    report = ImportReport()
+    dead_letter_file = _open_text(dead_letter, "a") if dead_letter else None
+
+    def reject(line: 'int', row: 'Any', error: 'Exception') -> 'None':
+        rejected = RejectedRow(line, row, error)
+        report.rejected.append(rejected)
+        if dead_letter_file is not None:
+            dead_letter_file.write(json.dumps(rejected.as_dict(), default=str) + "\n")
+
+    def save_batch(
+        batch: 'List[Tuple[int, Dict[str, Any], GEntity]]'
+    ) -> 'BulkResult':
+        # each batch is already under the commit limits, the
+        # concurrency comes from the batches themselves.
+        g_entities = [g_entity for _, _, g_entity in batch]
+        with model._cache_writing(g_entity.key for g_entity in g_entities): # type: ignore
+            return model._client.bulk_save( # type: ignore
+                g_entities,
+                max_workers=1
+            )
+
+    def finish_oldest(in_flight: 'List') -> 'None':
+        batch, future = in_flight.pop(0)
+        result = future.result()
+
+        failed = {
+            id(g_entity): chunk.error
+            for chunk in result.failures
+            for g_entity in chunk.items
+        }
+        for line, row, g_entity in batch:
+            if id(g_entity) in failed:
+                reject(line, row, failed[id(g_entity)])
+            else:
+                report.imported += 1
+
+        # the batches finish in order, so every line
+        # up to this one was saved or dead-lettered.
+        report.last_line = batch[-1][0]
+        if dead_letter_file is not None:
+            dead_letter_file.flush()
+        if checkpoint:
+            write_checkpoint(checkpoint, str(report.last_line))
+
+    in_flight: 'List[Tuple[List, Future]]' = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch: 'List[Tuple[int, Dict[str, Any], GEntity]]' = []
+            for line, row in numbered_rows:
+                if line <= resume_after:
+                    report.skipped += 1
+                    continue
+
+                try:
+                    data = _from_text(model, row) if from_text else row
+                    g_entity = model(**data).as_entity() # type: ignore
+                except (AttributeError, TypeError, ValueError) as error:
+                    reject(line, row, error)
+                    continue
+
+                batch.append((line, row, g_entity))
+                if len(batch) < batch_size:
+                    continue
+
+                in_flight.append((batch, executor.submit(save_batch, batch)))
+                batch = []
+                if len(in_flight) >= workers:
+                    finish_oldest(in_flight)
+
+            if batch:
+                in_flight.append((batch, executor.submit(save_batch, batch)))
+            while in_flight:
+                finish_oldest(in_flight)
+    finally:
+        if dead_letter_file is not None:
+            dead_letter_file.close()
+
+    # everything was imported (or dead-lettered), nothing left to resume.
+    if checkpoint:
+        write_checkpoint(checkpoint, None)
+
+    return report
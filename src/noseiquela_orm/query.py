@@ -1,46 +1,599 @@
+from itertools import islice
 from typing import TYPE_CHECKING
 
+from .cache import DEFAULT_QUERY_CACHE_TTL, dump_entity, query_cache
+from .client import DEFAULT_MAX_WORKERS, MAX_MUTATIONS_PER_COMMIT
+from .columns import Columns
+from .export import DEFAULT_EXPORT_PAGE_SIZE, get_writer
+from .transaction import current_transaction
+from .utils.background import interleaved, prefetched
+
 if TYPE_CHECKING:
     from functools import partial
-    from typing import Any, Dict, Tuple, Optional, Generator, Iterable, List
+    from typing import (
+        IO, Any, AsyncGenerator, Callable, Dict, Tuple, Optional, Generator, Hashable,
+        Iterable, Iterator, List, Type, Union
+    )
+    from google.cloud.datastore.entity import Entity as GEntity
+    from google.cloud.datastore.key import Key as GKey
+    from google.cloud.datastore.query import Iterator as GoogleIterator
     from google.cloud.datastore.query import Query as GoogleQuery
     from .entity import Model
 
+def _encode_cursor(cursor: 'Optional[Union[bytes, str]]') -> 'Optional[str]':
+    # the google iterator already gives a url-safe base64 cursor,
+    # just as 'bytes' instead of 'str'.
+    if isinstance(cursor, bytes):
+        return cursor.decode("ascii")
+    return cursor
+
+
+def _clone_query(query: 'GoogleQuery', **kwargs) -> 'GoogleQuery':
+    # the google query changes its lists in place, so a new
+    # query is mounted instead of changing the original one.
+    query_kwargs = {
+        "kind": query.kind,
+        "project": query.project,
+        "namespace": query.namespace,
+        "ancestor": query.ancestor,
+        "filters": list(query.filters),
+        "projection": list(query.projection),
+        "order": list(query.order),
+        "distinct_on": list(query.distinct_on),
+    }
+    query_kwargs.update(kwargs)
+    return query.__class__(query._client, **query_kwargs)
+
+
+def _freeze(value: 'Any') -> 'Any':
+    # a hashable version of the query values, for the query cache.
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if hasattr(value, "flat_path"):
+        return ("__key__", value.flat_path)
+    return value
+
+
+def _key_order(g_key: 'GKey') -> 'Tuple':
+    # same order used by the datastore: element by element of the
+    # path, with the numeric ids before the names.
+    path = g_key.flat_path
+    return tuple(
+        (path[idx], 0, path[idx + 1], "")
+        if isinstance(path[idx + 1], int)
+        else (path[idx], 1, 0, path[idx + 1])
+        for idx in range(0, len(path), 2)
+    )
+
+
+def _evenly_spaced_sample(
+    items: 'Iterable[Any]',
+    max_size: 'int'
+) -> 'List[Any]':
+    # keeps every 'step'-th item, doubling the step whenever the sample
+    # gets too big, so the memory stays bounded for any number of items.
+    sample: 'List[Any]' = []
+    step = 1
+    for idx, item in enumerate(items):
+        if idx % step:
+            continue
+
+        sample.append(item)
+        if len(sample) > max_size:
+            sample = sample[::2]
+            step *= 2
+    return sample
+
+
+class Page:
+    def __init__(
+        self,
+        items: 'List[Model]',
+        next_cursor: 'Optional[str]'=None
+    ) -> 'None':
+        self.items = items
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self) -> 'bool':
+        return self.next_cursor is not None
+
+    def __iter__(self) -> 'Iterator[Model]':
+        return iter(self.items)
+
+    def __len__(self) -> 'int':
+        return len(self.items)
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<Page - items: {len(self.items)}, "
+            f"next_cursor: {self.next_cursor}>"
+        )
+
+
 class QueryResult:
     def __init__(
         self,
         query: 'GoogleQuery',
-        entity_instance: 'Model',
+        entity_instance: 'Type[Model]',
         limit: 'Optional[int]'=None,
         offset: 'Optional[int]'=0,
+        start_cursor: 'Optional[str]'=None,
+        end_cursor: 'Optional[str]'=None,
         retry: 'Optional[int]'=None,
-        timeout: 'Optional[int]'=None
+        timeout: 'Optional[int]'=None,
+        prefetch: 'int'=0,
+        use_cache: 'Optional[bool]'=None
     ) -> 'None':
+        if prefetch < 0:
+            raise ValueError("'prefetch' must be zero or a positive number.")
+
         self.query = query
         self.limit = limit
         self.offset = offset
+        self.start_cursor = start_cursor
+        self.end_cursor = end_cursor
         self.retry = retry
         self.timeout = timeout
+        self.prefetch = prefetch
+        self.use_cache = use_cache
         self.entity_instance = entity_instance
 
+    def _fetch(
+        self,
+        query: 'Optional[GoogleQuery]'=None,
+        **kwargs
+    ) -> 'GoogleIterator':
+        fetch_kwargs = {
+            "limit": self.limit,
+            "offset": self.offset,
+            "start_cursor": self.start_cursor,
+            "end_cursor": self.end_cursor,
+            "retry": self.retry,
+            "timeout": self.timeout,
+        }
+        fetch_kwargs.update(kwargs)
+        return (query or self.query).fetch(**fetch_kwargs)
+
+    def _query_cache_ttl(self) -> 'Optional[float]':
+        # like the lookups, the queries of a transaction read (and
+        # only read) from its snapshot, never from the cache.
+        if self.use_cache is False or current_transaction(
+            self.entity_instance._client # type: ignore
+        ) is not None:
+            return None
+
+        ttl = getattr(self.entity_instance, "_query_cache_ttl", None)
+        if ttl is None and self.use_cache:
+            return DEFAULT_QUERY_CACHE_TTL
+        return ttl
+
+    def _query_cache_key(self) -> 'Optional[Hashable]':
+        query = self.query
+        query_key = (
+            _freeze(query.ancestor),
+            tuple(sorted(_freeze(query.filters), key=repr)),
+            tuple(query.order),
+            tuple(query.projection),
+            tuple(query.distinct_on),
+            self.limit,
+            self.offset,
+            self.start_cursor,
+            self.end_cursor,
+        )
+
+        try:
+            hash(query_key)
+        except TypeError:
+            return None
+        return query_key
+
+    def _entities(self) -> 'Generator[GEntity, None, None]':
+        ttl = self._query_cache_ttl()
+        query_key = None if ttl is None else self._query_cache_key()
+        if query_key is None:
+            yield from self._fetch_entities()
+            return
+
+        kind_key = (self.query.project, self.query.namespace, self.query.kind)
+        cached = query_cache.get(kind_key, query_key)
+        if cached is not None:
+            yield from cached
+            return
+
+        # the entities are serialized as they are read, before
+        # anyone gets the chance to change their values.
+        generation = query_cache.generation(kind_key)
+        values: 'Optional[List[bytes]]' = []
+        for g_entity in self._fetch_entities():
+            if values is not None:
+                values.append(dump_entity(g_entity))
+                if len(values) > query_cache.max_results:
+                    values = None
+            yield g_entity
+
+        if values is not None:
+            query_cache.set(kind_key, query_key, values, ttl, generation) # type: ignore
+
+    def _fetch_entities(self) -> 'Generator[GEntity, None, None]':
+        if not self.prefetch:
+            yield from self._fetch()
+            return
+
+        # the next pages are fetched on a background thread
+        # while the current one is consumed here.
+        for page in prefetched(
+            (list(page) for page in self._fetch().pages),
+            size=self.prefetch
+        ):
+            yield from page
+
+    def _mount(self, entity: 'GEntity') -> 'Model':
+        # the projections only bring some of the props, so
+        # their instances are kept out of the session.
+        return self.entity_instance._mount_from_google_entity(
+            entity,
+            use_session=not self.query.projection
+        )
+
     def __iter__(self) -> 'Generator[Model, None, None]':
-        for entity in self.query.fetch(
+        for entity in self._entities():
+            yield self._mount(entity)
+
+    async def __aiter__(self) -> 'AsyncGenerator[Model, None]':
+        aio = self.entity_instance._client.aio # type: ignore
+        async for entity in aio.iterate(self._entities()):
+            yield self._mount(entity)
+
+    def to_columns(self, fields: 'Optional[Iterable[str]]'=None) -> 'Columns':
+        return Columns.from_entities(
+            self.entity_instance,
+            self._entities(),
+            fields=fields
+        )
+
+    def _keys_only_query(self) -> 'GoogleQuery':
+        # 'distinct_on' only works on projected properties, and the
+        # keys come with any projection, so those are read instead.
+        return _clone_query(
+            self.query,
+            projection=list(self.query.distinct_on) or ["__key__"]
+        )
+
+    def keys(self) -> 'Generator[GKey, None, None]':
+        for entity in self._fetch(query=self._keys_only_query()):
+            yield entity.key
+
+    def ids(self) -> 'Generator[Union[str, int, Tuple], None, None]':
+        if not hasattr(self.entity_instance, "parent_id"):
+            for g_key in self.keys():
+                yield g_key.id_or_name
+            return
+
+        for g_key in self.keys():
+            yield (
+                g_key.parent.id_or_name if g_key.parent else None,
+                g_key.id_or_name
+            )
+
+    def delete(self, max_workers: 'int'=DEFAULT_MAX_WORKERS) -> 'int':
+        # the keys are streamed from a keys-only query, and deleted in
+        # groups of one commit per worker, so the memory stays bounded.
+        # deletes are idempotent: after a failure (which is raised) the
+        # query can simply be deleted again.
+        # a transaction could not hold an unbounded number of deletes.
+        if current_transaction(self.entity_instance._client) is not None: # type: ignore
+            raise ValueError("query deletes can not run inside a transaction.")
+
+        g_keys = self.keys()
+        group_size = MAX_MUTATIONS_PER_COMMIT * max(max_workers, 1)
+
+        deleted = 0
+        while True:
+            group = list(islice(g_keys, group_size))
+            if not group:
+                return deleted
+
+            deleted += self.entity_instance._delete_g_keys(
+                group,
+                max_workers=max_workers
+            )
+
+    def count(self) -> 'int':
+        return self._aggregate("count")
+
+    def sum(self, field: 'str') -> 'Union[int, float]':
+        return self._aggregate("sum", field)
+
+    def avg(self, field: 'str') -> 'Optional[float]':
+        return self._aggregate("avg", field)
+
+    def _aggregate(
+        self,
+        operation: 'str',
+        field: 'Optional[str]'=None
+    ) -> 'Any':
+        if field is not None and field not in self.entity_instance._prop_names: # type: ignore
+            raise AttributeError((
+                f"type object '{self.entity_instance.__name__}' "
+                f"has no attribute: {field}."
+            ))
+
+        datastore_field = (
+            None if field is None
+            else self.entity_instance._case_style(field) # type: ignore
+        )
+
+        # aggregation queries only exist on the newer versions of
+        # the google client, and they have no offset or cursors.
+        g_client = self.query._client
+        can_aggregate = (
+            hasattr(g_client, "aggregation_query") and
+            not (self.offset or self.start_cursor or self.end_cursor)
+        )
+        aggregation_query = (
+            g_client.aggregation_query(self.query)
+            if can_aggregate
+            else None
+        )
+        aggregate = getattr(aggregation_query, operation, None)
+
+        if aggregate is None:
+            return self._aggregate_locally(operation, datastore_field)
+
+        aggregate(
+            *(() if datastore_field is None else (datastore_field,)),
+            alias=operation
+        )
+        for results in aggregation_query.fetch( # type: ignore
             limit=self.limit,
-            offset=self.offset,
             retry=self.retry,
             timeout=self.timeout
         ):
-            yield self.entity_instance._mount_from_google_entity(
-                entity
+            for result in results:
+                if result.alias == operation:
+                    return result.value
+
+        return 0 if operation != "avg" else None
+
+    def _aggregate_locally(
+        self,
+        operation: 'str',
+        datastore_field: 'Optional[str]'=None
+    ) -> 'Any':
+        if operation == "count":
+            return sum(1 for _ in self.keys())
+
+        # only the aggregated property is read, through a projection query.
+        values = [
+            value
+            for entity in self._fetch(query=_clone_query(
+                self.query,
+                projection=[datastore_field, *(
+                    field for field in self.query.distinct_on
+                    if field != datastore_field
+                )]
+            ))
+            if (
+                isinstance((value:=entity.get(datastore_field)), (int, float))
+                and not isinstance(value, bool)
+            )
+        ]
+
+        if operation == "sum":
+            return sum(values)
+        return (sum(values) / len(values)) if values else None
+
+    def page(
+        self,
+        size: 'int',
+        start_cursor: 'Optional[str]'=None
+    ) -> 'Page':
+        entities, next_cursor = self._fetch_page(size, start_cursor)
+        return Page(
+            items=[self._mount(entity) for entity in entities],
+            next_cursor=next_cursor
+        )
+
+    def parallel(
+        self,
+        workers: 'int'=4,
+        shards: 'Optional[int]'=None,
+        buffer_size: 'int'=1000
+    ) -> 'ParallelQueryResult':
+        return ParallelQueryResult(
+            self,
+            workers=workers,
+            shards=(shards or workers),
+            buffer_size=buffer_size
+        )
+
+    def _fetch_page(
+        self,
+        size: 'int',
+        start_cursor: 'Optional[str]'=None
+    ) -> 'Tuple[List[GEntity], Optional[str]]':
+        if size < 1:
+            raise ValueError("'size' must be greater than zero.")
+
+        start_cursor = start_cursor or self.start_cursor
+        iterator = self._fetch(
+            limit=size,
+            # the offset only makes sense for the first page,
+            # the following ones start from the cursor.
+            offset=(0 if start_cursor else self.offset),
+            start_cursor=start_cursor,
+        )
+
+        entities = list(iterator)
+        return entities, _encode_cursor(iterator.next_page_token)
+
+    def export(
+        self,
+        fp: 'IO[str]',
+        format: 'str'="ndjson",
+        fields: 'Optional[Iterable[str]]'=None,
+        page_size: 'int'=DEFAULT_EXPORT_PAGE_SIZE,
+        start_cursor: 'Optional[str]'=None,
+        checkpoint: 'Optional[Callable[[Optional[str]], Any]]'=None
+    ) -> 'int':
+        writer = get_writer(
+            format,
+            fp,
+            self.entity_instance,
+            fields=fields,
+            # a resumed export keeps appending to the same output.
+            write_header=(start_cursor is None)
+        )
+
+        def fetch_pages() -> 'Generator[Tuple[List[GEntity], Optional[str]], None, None]':
+            cursor = start_cursor
+            while True:
+                entities, cursor = self._fetch_page(page_size, cursor)
+                yield entities, cursor
+
+                if cursor is None or not entities:
+                    return
+
+        pages = (
+            prefetched(fetch_pages(), size=self.prefetch)
+            if self.prefetch
+            else fetch_pages()
+        )
+
+        exported = 0
+        for entities, cursor in pages:
+            writer.write(entities)
+            exported += len(entities)
+
+            # the cursor is only handed over after the page is written.
+            fp.flush()
+            if checkpoint is not None:
+                checkpoint(cursor)
+
+        return exported
+
+
+class ParallelQueryResult:
+    # how many sampled keys are read for each split point.
+    OVERSAMPLING = 32
+
+    def __init__(
+        self,
+        result: 'QueryResult',
+        workers: 'int',
+        shards: 'int',
+        buffer_size: 'int'
+    ) -> 'None':
+        if workers < 1 or shards < 1:
+            raise ValueError("'workers' and 'shards' must be greater than zero.")
+
+        if result.query.order:
+            raise ValueError("ordered queries can not be split in key ranges.")
+
+        # the cursors belong to the original query, and a limit (or
+        # an offset) would be applied to each shard on its own.
+        if result.start_cursor or result.end_cursor or result.limit or result.offset:
+            raise ValueError((
+                "queries with cursors, limit or offset can not "
+                "be split in key ranges."
+            ))
+
+        self.result = result
+        self.workers = workers
+        self.shard_count = shards
+        self.buffer_size = buffer_size
+
+    def _sampled_keys(self) -> 'List[GKey]':
+        sample_size = (self.shard_count - 1) * self.OVERSAMPLING
+        if not sample_size:
+            return []
+
+        # the '__scatter__' property holds a random sample of the kind.
+        scatter_query = _clone_query(
+            self.result.query,
+            filters=[],
+            projection=["__key__"],
+            order=["__scatter__"]
+        )
+        g_keys = [
+            entity.key for entity in scatter_query.fetch(
+                limit=sample_size,
+                retry=self.result.retry,
+                timeout=self.result.timeout
             )
+        ]
+        if len(g_keys) >= self.shard_count - 1:
+            return g_keys
+
+        # small kinds (or the emulator) have no scatter
+        # sample, so the keys of the query itself are used.
+        return _evenly_spaced_sample(self.result.keys(), sample_size)
+
+    def split_keys(self) -> 'List[GKey]':
+        g_keys = sorted(self._sampled_keys(), key=_key_order)
+        if not g_keys:
+            return []
+
+        split_keys: 'List[GKey]' = []
+        for idx in range(1, self.shard_count):
+            g_key = g_keys[(idx * len(g_keys)) // self.shard_count]
+            if not split_keys or split_keys[-1] != g_key:
+                split_keys.append(g_key)
+        return split_keys
+
+    def shards(self) -> 'List[QueryResult]':
+        bounds: 'List[Optional[GKey]]' = [None, *self.split_keys(), None]
+
+        shards = []
+        for lower, upper in zip(bounds, bounds[1:]):
+            filters = list(self.result.query.filters)
+            if lower is not None:
+                filters.append(("__key__", ">=", lower))
+            if upper is not None:
+                filters.append(("__key__", "<", upper))
+
+            shards.append(QueryResult(
+                _clone_query(self.result.query, filters=filters),
+                self.result.entity_instance,
+                retry=self.result.retry,
+                timeout=self.result.timeout,
+                prefetch=self.result.prefetch,
+                use_cache=self.result.use_cache
+            ))
+        return shards
+
+    def _entities(self) -> 'Iterator[GEntity]':
+        return interleaved(
+            [shard._entities() for shard in self.shards()],
+            max_workers=self.workers,
+            size=self.buffer_size
+        )
+
+    def __iter__(self) -> 'Generator[Model, None, None]':
+        for entity in self._entities():
+            yield self.result._mount(entity)
 
 
 class Query:
     def __init__(
         self,
-        partial_query: 'partial',
+        partial_query: 'Optional[partial]'=None,
     ) -> 'None':
-        self.partial_query = partial_query
+        self._partial_query = partial_query
+
+    @property
+    def partial_query(self) -> 'partial':
+        if self._partial_query is not None:
+            return self._partial_query
+
+        # resolved on every use, so the model always gets the
+        # current client from the pool.
+        return self.entity_instance._client.get_partial_query(
+            kind=self.entity_instance.kind
+        )
 
     def __get__(self, owner_instance, owner_class):
         self.entity_instance = owner_class
@@ -49,18 +602,30 @@ class Query:
     def all(
         self,
         order_by: 'Optional[Tuple[str]]'=None,
-        projection: 'Optional[Tuple[str]]'=None
+        projection: 'Optional[Tuple[str]]'=None,
+        start_cursor: 'Optional[str]'=None,
+        end_cursor: 'Optional[str]'=None,
+        prefetch: 'int'=0,
+        use_cache: 'Optional[bool]'=None
     ) -> 'QueryResult':
         query = self.__mount_query(
             order_by=order_by,
             projection=projection
         )
-        return QueryResult(query, self.entity_instance)
+        return QueryResult(
+            query,
+            self.entity_instance,
+            start_cursor=start_cursor,
+            end_cursor=end_cursor,
+            prefetch=prefetch,
+            use_cache=use_cache
+        )
 
     def first(
         self,
         order_by: 'Optional[Tuple[str]]'=None,
-        projection: 'Optional[Tuple[str]]'=None
+        projection: 'Optional[Tuple[str]]'=None,
+        use_cache: 'Optional[bool]'=None
     ) -> 'Optional[Model]':
         query = self.__mount_query(
             order_by=order_by,
@@ -70,7 +635,8 @@ class Query:
             item for item in QueryResult(
                 query,
                 self.entity_instance,
-                limit=1
+                limit=1,
+                use_cache=use_cache
             )
         ]
         return result_iterator[0] if result_iterator else None
@@ -80,7 +646,11 @@ class Query:
         order_by: 'Optional[Tuple[str]]'=None,
         projection: 'Optional[Tuple[str]]'=None,
         distinct_on: 'Optional[Tuple[str]]'=None,
-        parent_id: 'Optional[Tuple[str]]'=None,
+        parent_id: 'Optional[Union[str, int, GKey]]'=None,
+        start_cursor: 'Optional[str]'=None,
+        end_cursor: 'Optional[str]'=None,
+        prefetch: 'int'=0,
+        use_cache: 'Optional[bool]'=None,
         **kwargs
     ) -> 'QueryResult':
         query = self.__mount_query(
@@ -90,7 +660,14 @@ class Query:
             order_by=order_by,
             distinct_on=distinct_on,
         )
-        return QueryResult(query, self.entity_instance)
+        return QueryResult(
+            query,
+            self.entity_instance,
+            start_cursor=start_cursor,
+            end_cursor=end_cursor,
+            prefetch=prefetch,
+            use_cache=use_cache
+        )
 
     def __mount_query(
         self,
@@ -98,16 +675,30 @@ class Query:
         order_by: 'Optional[Tuple[str]]'=None,
         projection: 'Optional[Tuple[str]]'=None,
         distinct_on: 'Optional[Tuple[str]]'=None,
-        parent_id: 'Optional[Tuple[str]]'=None
+        parent_id: 'Optional[Union[str, int, GKey]]'=None
     ) -> 'GoogleQuery':
         return self.partial_query(
             filters=(filters or ()),
-            ancestor=(parent_id or None),
+            ancestor=self.__mount_ancestor(parent_id),
             projection=(projection or ()),
             order=(order_by or ()),
             distinct_on=(distinct_on or ()),
         )
 
+    def __mount_ancestor(
+        self,
+        parent_id: 'Optional[Union[str, int, GKey]]'
+    ) -> 'Optional[GKey]':
+        if not parent_id or hasattr(parent_id, "flat_path"):
+            return parent_id or None # type: ignore
+
+        if not hasattr(self.entity_instance, "_parent_complete_g_key"):
+            raise ValueError((
+                f"type object '{self.entity_instance.__name__}' has no parent, "
+                "'parent_id' must not be set."
+            ))
+        return self.entity_instance._parent_complete_g_key(parent_id)
+
     def __process_filters(self, filter_dict: 'Dict') -> 'List':
         OPERATIONS_TO_QUERY = {
             "eq": "=",
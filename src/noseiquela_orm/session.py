@@ -0,0 +1,128 @@
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from .cache import writing
+from .client import BulkResult, DEFAULT_MAX_WORKERS
+
+if TYPE_CHECKING:
+    from contextvars import Token
+    from typing import Dict, Hashable, List, Optional
+
+    from google.cloud.datastore.key import Key as GKey
+
+    from .entity import Model
+
+
+_current_session: 'ContextVar[Optional[Session]]' = ContextVar(
+    "noseiquela_orm_session", default=None
+)
+
+
+def _identity(g_key: 'GKey') -> 'Hashable':
+    return (g_key.project, g_key.namespace, g_key.flat_path)
+
+
+class Session:
+    """Unit of work with an identity map.
+
+    While the session is active, every entity loaded by id or by a
+    query is mounted only once (the same instance is returned again,
+    without going to the datastore for the lookups by id), and the
+    saves are only collected, to be committed together when the session
+    ends. If the ``with`` block raises, the collected saves are dropped.
+    """
+
+    def __init__(self, max_workers: 'int'=DEFAULT_MAX_WORKERS) -> 'None':
+        self.max_workers = max_workers
+        self._identity_map: 'Dict[Hashable, Model]' = {}
+        self._pending: 'Dict[int, Model]' = {}
+        self._token: 'Optional[Token]' = None
+
+    def get(self, g_key: 'GKey') -> 'Optional[Model]':
+        return self._identity_map.get(_identity(g_key))
+
+    def add(self, instance: 'Model', g_key: 'GKey') -> 'Model':
+        # the first instance mounted for a key is the one kept.
+        if g_key.is_partial:
+            return instance
+        return self._identity_map.setdefault(_identity(g_key), instance)
+
+    def save(self, instance: 'Model') -> 'None':
+        self._pending.setdefault(id(instance), instance)
+        if instance.id is not None:
+            self._identity_map[_identity(instance._mount_entity_g_key())] = instance
+
+    def discard(self, g_key: 'GKey') -> 'None':
+        # a deleted entity is forgotten, and its pending save dropped.
+        instance = self._identity_map.pop(_identity(g_key), None)
+        if instance is not None:
+            self._pending.pop(id(instance), None)
+
+    def flush(self) -> 'BulkResult':
+        instances = list(self._pending.values())
+        self._pending.clear()
+
+        # the models sharing a client are committed together.
+        by_client: 'Dict[int, List[Model]]' = {}
+        for instance in instances:
+            by_client.setdefault(id(type(instance)._client), []).append(instance) # type: ignore
+
+        chunks = []
+        for client_instances in by_client.values():
+            chunks.extend(self._flush_instances(client_instances).chunks)
+        return BulkResult(chunks)
+
+    def _flush_instances(self, instances: 'List[Model]') -> 'BulkResult':
+        g_entities = [instance.as_entity() for instance in instances]
+        client = type(instances[0])._client # type: ignore
+
+        with writing(
+            (type(instance), g_entity.key) # type: ignore
+            for instance, g_entity in zip(instances, g_entities)
+        ):
+            result = client.bulk_save(
+                entities=g_entities,
+                max_workers=self.max_workers
+            )
+
+        instance_by_entity = {
+            id(g_entity): instance
+            for g_entity, instance in zip(g_entities, instances)
+        }
+        for g_entity in result.items:
+            instance = instance_by_entity[id(g_entity)]
+            instance.id = g_entity.key.id_or_name
+            instance._take_snapshot()
+            self.add(instance, g_entity.key)
+
+        return result
+
+    def __enter__(self) -> 'Session':
+        self._token = _current_session.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> 'None':
+        _current_session.reset(self._token) # type: ignore
+        self._token = None
+
+        if exc_type is not None:
+            self._pending.clear()
+            return
+
+        result = self.flush()
+        if not result.ok:
+            raise result.failures[0].error # type: ignore
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<Session - loaded: {len(self._identity_map)}, "
+            f"pending: {len(self._pending)}>"
+        )
+
+
+def session(max_workers: 'int'=DEFAULT_MAX_WORKERS) -> 'Session':
+    return Session(max_workers=max_workers)
+
+
+def current_session() -> 'Optional[Session]':
+    return _current_session.get()
@@ -0,0 +1,222 @@
+from contextvars import ContextVar
+from functools import partial, wraps
+from random import uniform
+from time import sleep
+from typing import TYPE_CHECKING
+
+from .cache import writing
+from .session import _identity
+
+if TYPE_CHECKING:
+    from contextvars import Token
+    from typing import (
+        Any, Callable, Dict, Hashable, List, Optional, Tuple, Type, TypeVar
+    )
+
+    from google.cloud.datastore.entity import Entity as GEntity
+    from google.cloud.datastore.key import Key as GKey
+    from google.cloud.datastore.transaction import Transaction as GTransaction
+
+    from .client import DatastoreClient
+    from .entity import Model
+
+    _Result = TypeVar("_Result")
+
+
+DEFAULT_RETRIES = 3
+# base and cap (in seconds) of the backoff between the attempts.
+DEFAULT_BACKOFF = 0.1
+MAX_BACKOFF = 5.0
+
+_current_transaction: 'ContextVar[Optional[Transaction]]' = ContextVar(
+    "noseiquela_orm_transaction", default=None
+)
+
+
+class Transaction:
+    """Datastore transaction, with the writes buffered until the commit.
+
+    While it is active, the lookups by id of the models sharing its
+    client read from the transaction (skipping the caches and the
+    session), and their saves and deletes are only collected, to be sent
+    in a single commit when the ``with`` block ends. If the block
+    raises, the transaction is rolled back and nothing is written.
+
+    A read-only transaction gives a consistent snapshot for its lookups,
+    and refuses any write. The queries run in the thread of the block
+    read from the transaction too.
+
+    A transaction opened inside another one of the same client joins
+    it: its block is part of the outer transaction, which commits (or
+    rolls back) everything when it ends.
+    """
+
+    def __init__(
+        self,
+        client: 'DatastoreClient',
+        read_only: 'bool'=False
+    ) -> 'None':
+        self.client = client
+        self.read_only = read_only
+        self._transaction: 'Optional[GTransaction]' = None
+        self._saves: 'Dict[int, Model]' = {}
+        self._deletes: 'Dict[Hashable, Tuple[Type[Model], GKey]]' = {}
+        self._token: 'Optional[Token]' = None
+        self._outer: 'Optional[Transaction]' = None
+
+    def get_multi(self, g_keys: 'List[GKey]') -> 'List[Optional[GEntity]]':
+        return self.client.get_multi(g_keys, transaction=self._transaction)
+
+    def save(self, instance: 'Model') -> 'None':
+        self._check_writable()
+        if instance.id is not None:
+            self._deletes.pop(_identity(instance._mount_entity_g_key()), None)
+        self._saves[id(instance)] = instance
+
+    def delete(self, model: 'Type[Model]', g_key: 'GKey') -> 'None':
+        # the last write of an entity is the one committed.
+        self._check_writable()
+        identity = _identity(g_key)
+        self._saves = {
+            key: instance for key, instance in self._saves.items()
+            if instance.id is None
+            or _identity(instance._mount_entity_g_key()) != identity
+        }
+        self._deletes[identity] = (model, g_key)
+
+    def _check_writable(self) -> 'None':
+        if self.read_only:
+            raise ValueError("read-only transactions can not write.")
+
+    def commit(self) -> 'None':
+        instances = list(self._saves.values())
+        deletes = list(self._deletes.values())
+        self._saves.clear()
+        self._deletes.clear()
+
+        g_entities = [instance.as_entity() for instance in instances]
+        for g_entity in g_entities:
+            self._transaction.put(g_entity) # type: ignore
+        for _, g_key in deletes:
+            self._transaction.delete(g_key) # type: ignore
+
+        with writing([
+            *((type(instance), g_entity.key) for instance, g_entity in zip(instances, g_entities)),
+            *deletes
+        ]):
+            # the partial keys are completed in place by the commit.
+            self._transaction.commit() # type: ignore
+
+        for instance, g_entity in zip(instances, g_entities):
+            instance.id = g_entity.key.id_or_name
+            instance._take_snapshot()
+
+    def rollback(self) -> 'None':
+        self._saves.clear()
+        self._deletes.clear()
+        self._transaction.rollback() # type: ignore
+
+    def __enter__(self) -> 'Transaction':
+        outer = _current_transaction.get()
+        if outer is not None:
+            if outer.client is not self.client:
+                raise ValueError("transactions of different clients can not be nested.")
+            self._outer = outer
+            return outer
+
+        self._transaction = self.client.transaction(read_only=self.read_only)
+        self._transaction.begin()
+        # as the current batch of the google client, the
+        # transaction is also used by the queries.
+        self.client._client._push_batch(self._transaction)
+        self._token = _current_transaction.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> 'None':
+        if self._outer is not None:
+            # the outer transaction ends (and retries) everything.
+            self._outer = None
+            return
+
+        _current_transaction.reset(self._token) # type: ignore
+        self._token = None
+        self.client._client._pop_batch()
+
+        if exc_type is None:
+            try:
+                self.commit()
+                return
+            except Exception:
+                # not to keep its locks until it times out, a transaction
+                # that fails to commit is rolled back too.
+                self._rollback_quietly()
+                raise
+
+        self._rollback_quietly()
+
+    def _rollback_quietly(self) -> 'None':
+        # a failed rollback must not hide the original error.
+        try:
+            self.rollback()
+        except Exception:
+            pass
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<Transaction - read_only: {self.read_only}, "
+            f"saves: {len(self._saves)}, deletes: {len(self._deletes)}>"
+        )
+
+
+def current_transaction(client: 'DatastoreClient') -> 'Optional[Transaction]':
+    # only the models sharing the client of the transaction take part in it.
+    transaction = _current_transaction.get()
+    if transaction is None or transaction.client is not client:
+        return None
+    return transaction
+
+
+def run_in_transaction(
+    model: 'Type[Model]',
+    func: 'Callable[[], _Result]',
+    retries: 'int'=DEFAULT_RETRIES,
+    read_only: 'bool'=False
+) -> '_Result':
+    from google.api_core.exceptions import Aborted
+
+    # inside a transaction of the same client, the function joins it,
+    # and it is the outer one that runs again on contention.
+    if current_transaction(model._client) is not None: # type: ignore
+        with Transaction(model._client, read_only=read_only): # type: ignore
+            return func()
+
+    attempt = 0
+    while True:
+        try:
+            with Transaction(model._client, read_only=read_only): # type: ignore
+                return func()
+        except Aborted:
+            # contention: the whole function runs again, after a random
+            # wait (full jitter) of an exponentially growing limit.
+            if attempt >= retries:
+                raise
+            sleep(uniform(0, min(MAX_BACKOFF, DEFAULT_BACKOFF * (2 ** attempt))))
+            attempt += 1
+
+
+def transactional(
+    model: 'Type[Model]',
+    retries: 'int'=DEFAULT_RETRIES,
+    read_only: 'bool'=False
+) -> 'Callable[[Callable[..., _Result]], Callable[..., _Result]]':
+    def decorator(func: 'Callable[..., _Result]') -> 'Callable[..., _Result]':
+        @wraps(func)
+        def wrapper(*args, **kwargs) -> 'Any':
+            return run_in_transaction(
+                model,
+                partial(func, *args, **kwargs),
+                retries=retries,
+                read_only=read_only
+            )
+        return wrapper
+    return decorator
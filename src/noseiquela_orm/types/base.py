@@ -8,6 +8,20 @@ if TYPE_CHECKING:
 
 
 class BaseProperty(ABC):
+    # converters applied by the model codecs when writing to and reading
+    # from the datastore, 'None' keeps the value as it is.
+    _to_datastore: 'Optional[Callable[[Any], Any]]' = None
+    _from_datastore: 'Optional[Callable[[Any], Any]]' = None
+    # set by the model metaclass on compact models, where the
+    # values are kept in slots instead of the instance '__dict__'.
+    _slot: 'Optional[Any]' = None
+    # 'array' typecode used when exporting the property to typed
+    # columns, 'None' keeps the values in a list of objects.
+    _array_typecode: 'Optional[str]' = None
+    # parses the values read from text inputs (csv...) before
+    # the validations, 'None' keeps the string as it is.
+    _from_text: 'Optional[Callable[[str], Any]]' = None
+
     def __init__(
         self,
         *, # keyword-only
@@ -35,12 +49,22 @@ class BaseProperty(ABC):
 
     def __set__(self, owner_instance, value):
         value = self._parse_and_validate(value)
-        owner_instance.__dict__[self._property_name] = value
+        if self._slot is not None:
+            self._slot.__set__(owner_instance, value)
+        else:
+            owner_instance.__dict__[self._property_name] = value
+        owner_instance._mark_changed(self._property_name, value)
 
     def __get__(self, owner_instance, owner_class):
         if owner_instance is None:
             return self
 
+        if self._slot is not None:
+            try:
+                return self._slot.__get__(owner_instance, owner_class)
+            except AttributeError:
+                return None
+
         return owner_instance.__dict__.get(
             self._property_name
         )
@@ -12,7 +12,14 @@ if TYPE_CHECKING:
     from ..entity import Model # type: ignore
 
 
+def _parse_id(value: 'str') -> 'Union[str, int]':
+    # numeric ids are exported as their digits, names as they are.
+    return int(value) if value.isdigit() else value
+
+
 class KeyProperty(BaseProperty):
+    _from_text = staticmethod(_parse_id)
+
     def __init__(
         self,
         *,
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
@@ -14,7 +15,19 @@ if TYPE_CHECKING:
     )
 
 
+def _parse_bool(value: 'str') -> 'Any':
+    lowered = value.strip().lower()
+    if lowered in ("true", "1"):
+        return True
+    if lowered in ("false", "0"):
+        return False
+    return value
+
+
 class BooleanProperty(BaseProperty):
+    _array_typecode = "b"
+    _from_text = staticmethod(_parse_bool)
+
     def __init__(
         self,
         *,
@@ -137,6 +150,7 @@ class FloatProperty(BaseProperty):
             _prop_name=_prop_name,
         )
         self._force_string = force_string
+        self._array_typecode = None if force_string else "d"
         self._min_value = None if min is None else str(min)
         self._max_value = None if max is None else str(max)
 
@@ -172,6 +186,9 @@ class FloatProperty(BaseProperty):
 
 
 class IntegerProperty(BaseProperty):
+    _array_typecode = "q"
+    _from_text = staticmethod(int)
+
     def __init__(
         self,
         *,
@@ -286,6 +303,8 @@ class StringProperty(BaseProperty):
 
 
 class ListProperty(BaseProperty):
+    _from_text = staticmethod(json.loads)
+
     def __init__(
         self,
         *,
@@ -337,6 +356,10 @@ class ListProperty(BaseProperty):
 
 
 class DictProperty(BaseProperty):
+    # embedded entities are read back as 'Entity' instances.
+    _from_datastore = staticmethod(dict)
+    _from_text = staticmethod(json.loads)
+
     def __init__(
         self,
         *,
@@ -0,0 +1,114 @@
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import Iterable, Iterator, TypeVar
+
+_Items = TypeVar("_Items")
+
+_DONE = object()
+_POLL_INTERVAL = 0.1
+
+
+def prefetched(items: Iterable[_Items], size: int) -> Iterator[_Items]:
+    """Iterate over ``items`` while a background thread fetches the next ones.
+
+    At most ``size`` items are kept ahead of the consumer. Errors raised while
+    fetching are re-raised on the consumer side, and the background thread is
+    stopped when the consumer stops early (``break``, ``close()``, errors...):
+
+    ```python
+    >>> for page in prefetched(iterator.pages, size=2):
+    ...     process(page)  # the next 2 pages are being fetched meanwhile
+    ```
+    """
+
+    return interleaved([items], max_workers=1, size=size)
+
+
+def interleaved(
+    iterables: Iterable[Iterable[_Items]],
+    max_workers: int,
+    size: int,
+) -> Iterator[_Items]:
+    """Iterate over all the ``iterables`` at once, consuming them on up to
+    ``max_workers`` background threads.
+
+    The items are yielded as they arrive, so the order is only kept inside each
+    iterable. At most ``size`` items are kept ahead of the consumer, errors are
+    re-raised on the consumer side and the threads are stopped when the consumer
+    stops early:
+
+    ```python
+    >>> for entity in interleaved([shard_1, shard_2, shard_3], max_workers=2, size=100):
+    ...     process(entity)
+    ```
+    """
+
+    if size < 1:
+        raise ValueError("'size' must be greater than zero.")
+
+    if max_workers < 1:
+        raise ValueError("'max_workers' must be greater than zero.")
+
+    return _interleaved(list(iterables), max_workers, size)
+
+
+def _interleaved(
+    iterables: "list",
+    max_workers: int,
+    size: int,
+) -> Iterator[_Items]:
+    pending: "Queue" = Queue()
+    for iterable in iterables:
+        pending.put(iterable)
+
+    buffer: "Queue" = Queue(maxsize=size)
+    stop = Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        while not stop.is_set():
+            try:
+                iterable = pending.get_nowait()
+            except Empty:
+                break
+
+            try:
+                for item in iterable:
+                    if not put((item, None)) or stop.is_set():
+                        return
+            except BaseException as error:
+                put((_DONE, error))
+                return
+        put((_DONE, None))
+
+    workers = min(max_workers, len(iterables))
+    for _ in range(workers):
+        Thread(target=produce, name="noseiquela-background", daemon=True).start()
+
+    try:
+        finished = 0
+        while finished < workers:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                finished += 1
+                continue
+            yield item
+    finally:
+        # the producers stop after the item they may be fetching
+        # now, there is no need to wait for them here.
+        stop.set()
+        while True:
+            try:
+                buffer.get_nowait()
+            except Empty:
+                break
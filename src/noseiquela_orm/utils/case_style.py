@@ -1,66 +1,102 @@
 from typing import TYPE_CHECKING
-from re import finditer
+from re import compile as compile_regex
 
 if TYPE_CHECKING:
-    from typing import List
+    from typing import Callable, Dict, Iterable, List
+
+
+_WORDS_PATTERN = compile_regex(
+    '.+?(?:(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|$)'
+)
+
+
+def _split_words(string_value: 'str') -> 'List[str]':
+    return [w.group(0) for w in _WORDS_PATTERN.finditer(string_value)]
 
 
 class CaseStyle:
-    def __init__(self, from_case: 'str'="snake_case", to_case: 'str'="snake_case") -> 'None':
+    _PARSE_FUNCTIONS: 'Dict[str, Callable[[str], List[str]]]' = {
+        "camel_case": _split_words,
+        "pascal_case": _split_words,
+        "kebab_case": lambda string_value: string_value.split('-'),
+        "snake_case": lambda string_value: string_value.split('_')
+    }
+
+    _JOIN_FUNCTIONS: 'Dict[str, Callable[[List[str]], str]]' = {
+        "camel_case": lambda key_list: key_list[0].lower() + ''.join(
+            [x.title() for x in key_list[1:]]
+        ),
+        "pascal_case": lambda key_list: ''.join(
+            [x.title() for x in key_list]
+        ),
+        "kebab_case": lambda key_list: '-'.join(
+            [x.lower() for x in key_list]
+        ),
+        "snake_case": lambda key_list: '_'.join(
+            [x.lower() for x in key_list]
+        )
+    }
+
+    def __init__(
+        self,
+        from_case: 'str'="snake_case",
+        to_case: 'str'="snake_case",
+        max_cache_size: 'int'=1024
+    ) -> 'None':
         self.from_case = from_case
         self.to_case = to_case
+        self.max_cache_size = max_cache_size
+        self._converted: 'Dict[str, str]' = {}
+        self._reverted: 'Dict[str, str]' = {}
 
-    @staticmethod
-    def _from_case_style(case_style: 'str', string_value: 'str') -> 'List[str]':
-        parse_functions = {
-            "camel_case": lambda string_value: [
-                w.group(0) for w in finditer(
-                    '.+?(?:(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|$)',
-                    string_value
-                )
-            ],
-            "pascal_case": lambda string_value: [
-                w.group(0) for w in finditer(
-                    '.+?(?:(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])|$)',
-                    string_value
-                )
-            ],
-            "kebab_case": lambda string_value: string_value.split('-'),
-            "snake_case": lambda string_value: string_value.split('_')
-        }
-
-        return parse_functions[case_style](string_value)
-
-
-    @staticmethod
-    def _to_case_style(case_style: 'str', key_list: 'List[str]') -> 'str':
-        parse_functions = {
-            "camel_case": lambda key_list: key_list[0].lower() + ''.join(
-                [x.title() for x in key_list[1:]]
-            ),
-            "pascal_case": lambda key_list: ''.join(
-                [x.title() for x in key_list]
-            ),
-            "kebab_case": lambda key_list: '-'.join(
-                [x.lower() for x in key_list]
-            ),
-            "snake_case": lambda key_list: '_'.join(
-                [x.lower() for x in key_list]
-            )
-        }
-
-        return parse_functions[case_style](key_list)
+    @classmethod
+    def _from_case_style(cls, case_style: 'str', string_value: 'str') -> 'List[str]':
+        return cls._PARSE_FUNCTIONS[case_style](string_value)
+
+    @classmethod
+    def _to_case_style(cls, case_style: 'str', key_list: 'List[str]') -> 'str':
+        return cls._JOIN_FUNCTIONS[case_style](key_list)
+
+    def _cache(self, cache: 'Dict[str, str]', value: 'str', result: 'str') -> 'str':
+        # the cache only holds names (properties, filters...), when it
+        # gets full something is generating them, so it starts over.
+        if len(cache) >= self.max_cache_size:
+            cache.clear()
+        cache[value] = result
+        return result
+
+    def warm(self, values: 'Iterable[str]') -> 'None':
+        for value in values:
+            self.revert(self(value))
 
     def revert(self, value: 'str') -> 'str':
         if self.from_case == self.to_case:
             return value
 
+        try:
+            return self._reverted[value]
+        except KeyError:
+            pass
+
         splitad_value = self._from_case_style(self.to_case, value)
-        return self._to_case_style(self.from_case, splitad_value)
+        return self._cache(
+            self._reverted,
+            value,
+            self._to_case_style(self.from_case, splitad_value)
+        )
 
     def __call__(self, value: 'str') -> 'str':
         if self.from_case == self.to_case:
             return value
 
+        try:
+            return self._converted[value]
+        except KeyError:
+            pass
+
         splitad_value = self._from_case_style(self.from_case, value)
-        return self._to_case_style(self.to_case, splitad_value)
+        return self._cache(
+            self._converted,
+            value,
+            self._to_case_style(self.to_case, splitad_value)
+        )
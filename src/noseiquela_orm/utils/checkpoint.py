@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+
+def read_checkpoint(path: Optional[str]) -> Optional[str]:
+    """Read the value saved by ``write_checkpoint``, ``None`` when there is none."""
+
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path) as checkpoint_file:
+        return checkpoint_file.read().strip() or None
+
+
+def write_checkpoint(path: str, value: Optional[str]) -> None:
+    """Save ``value`` to ``path``, or remove the checkpoint when it is ``None``.
+
+    The value is written to a temporary file that then replaces the checkpoint,
+    so an interrupted write never leaves a broken checkpoint behind.
+    """
+
+    if value is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as checkpoint_file:
+        checkpoint_file.write(value)
+    os.replace(temp_path, path)
@@ -1,7 +1,8 @@
-from typing import Dict, TypeVar
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar
 
 _Keys = TypeVar("_Keys")
 _Values = TypeVar("_Values")
+_Items = TypeVar("_Items")
 
 
 def merge_dicts(
@@ -27,3 +28,45 @@ def merge_dicts(
     # TODO(python3.9): replace this function with the dictionary union operator when
     # support for python3.8 is dropped
     return {**left, **right}
+
+
+def chunked(
+    items: Iterable[_Items],
+    max_items: int,
+    max_size: Optional[int] = None,
+    size_of: Optional[Callable[[_Items], int]] = None,
+) -> Iterator[List[_Items]]:
+    """Split the items into lists with at most ``max_items`` elements.
+
+    When ``max_size`` and ``size_of`` are given, the sum of the sizes of the
+    items in each list is also kept under ``max_size``. An item that alone is
+    bigger than ``max_size`` is yielded in a list of its own:
+
+    ```python
+    >>> list(chunked([1, 2, 3, 4, 5], max_items=2))
+    [[1, 2], [3, 4], [5]]
+    >>> list(chunked(["aa", "b", "cc", "ddd"], max_items=10, max_size=3, size_of=len))
+    [["aa", "b"], ["cc"], ["ddd"]]
+    ```
+    """
+
+    if max_items < 1:
+        raise ValueError("'max_items' must be greater than zero.")
+
+    chunk: List[_Items] = []
+    chunk_size = 0
+    for item in items:
+        item_size = size_of(item) if (max_size and size_of) else 0
+
+        if chunk and (
+            len(chunk) >= max_items or
+            (max_size and chunk_size + item_size > max_size)
+        ):
+            yield chunk
+            chunk, chunk_size = [], 0
+
+        chunk.append(item)
+        chunk_size += item_size
+
+    if chunk:
+        yield chunk
@@ -0,0 +1,205 @@
+import atexit
+import os
+from queue import Empty, Queue
+from threading import Lock, Thread
+from time import monotonic
+from typing import TYPE_CHECKING
+from weakref import WeakSet
+
+from .cache import writing
+from .client import DEFAULT_MAX_WORKERS, MAX_MUTATIONS_PER_COMMIT
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Optional, Tuple, Type
+
+    from google.cloud.datastore.entity import Entity as GEntity
+
+    from .entity import Model
+
+
+DEFAULT_MAX_QUEUE_SIZE = 10000
+DEFAULT_MAX_LATENCY = 0.5
+
+# markers put in the queue to cut the current batch short.
+_FLUSH = object()
+_STOP = object()
+
+_queues: 'WeakSet[WriteBehindQueue]' = WeakSet()
+
+
+class WriteBehindQueue:
+    """Bounded queue of entities saved in the background.
+
+    The deferred saves only encode the entity and put it in the queue,
+    a background thread commits them (through ``bulk_save``) in batches
+    of up to ``batch_size`` entities, waiting at most ``max_latency``
+    seconds for a batch to fill up. When the queue is full, the saves
+    wait for room (or raise ``queue.Full`` after their ``timeout``).
+
+    The batches that fail are given to ``on_failure`` with the error,
+    when it is set; in any case they are counted in ``failed``. Whatever
+    is still in the queue is written when the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        max_size: 'int'=DEFAULT_MAX_QUEUE_SIZE,
+        batch_size: 'int'=MAX_MUTATIONS_PER_COMMIT,
+        max_latency: 'float'=DEFAULT_MAX_LATENCY,
+        max_workers: 'int'=DEFAULT_MAX_WORKERS,
+        on_failure: 'Optional[Callable[[List[GEntity], Exception], None]]'=None
+    ) -> 'None':
+        if max_size < 1 or batch_size < 1:
+            raise ValueError("'max_size' and 'batch_size' must be greater than zero.")
+
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.max_workers = max_workers
+        self.on_failure = on_failure
+        self.written = 0
+        self.failed = 0
+        self._queue: 'Queue' = Queue(maxsize=max_size)
+        self._thread: 'Optional[Thread]' = None
+        self._lock = Lock()
+        self._registered = False
+        self._closing = False
+        _queues.add(self)
+
+    def _reset(self) -> 'None':
+        # a forked process gets neither the thread nor the pending saves
+        # of its parent, which writes them itself.
+        self._queue = Queue(maxsize=self._queue.maxsize)
+        self._thread = None
+        self._lock = Lock()
+        self._closing = False
+
+    def put(
+        self,
+        model: 'Type[Model]',
+        g_entity: 'GEntity',
+        timeout: 'Optional[float]'=None
+    ) -> 'None':
+        self._start()
+        self._queue.put((model, g_entity), timeout=timeout)
+
+    def _start(self) -> 'None':
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if not self._registered:
+                atexit.register(self.close)
+                self._registered = True
+            if self._thread is None or not self._thread.is_alive():
+                self._closing = False
+                self._thread = Thread(
+                    target=self._run,
+                    name="noseiquela-write-behind",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> 'None':
+        while True:
+            batch: 'List[Tuple[Type[Model], GEntity]]' = []
+            markers = 0
+            stop = False
+
+            item = self._queue.get()
+            deadline = monotonic() + self.max_latency
+            while True:
+                if item is _STOP or item is _FLUSH:
+                    markers += 1
+                    stop = item is _STOP
+                    break
+
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+
+                try:
+                    item = self._queue.get(timeout=max(deadline - monotonic(), 0))
+                except Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: 'List[Tuple[Type[Model], GEntity]]') -> 'None':
+        # the models sharing a client are committed together.
+        by_client: 'Dict[int, List[Tuple[Type[Model], GEntity]]]' = {}
+        for model, g_entity in batch:
+            by_client.setdefault(
+                id(model._client), [] # type: ignore
+            ).append((model, g_entity))
+
+        for items in by_client.values():
+            g_entities = [g_entity for _, g_entity in items]
+            try:
+                with writing(
+                    (model, g_entity.key) for model, g_entity in items
+                ):
+                    # when closing (at the exit of the interpreter, usually)
+                    # no new threads can be used, the chunks go one by one.
+                    result = items[0][0]._client.bulk_save( # type: ignore
+                        g_entities,
+                        max_workers=1 if self._closing else self.max_workers
+                    )
+            except Exception as error:
+                self._failed(g_entities, error)
+                continue
+
+            self.written += len(result.items)
+            for chunk in result.failures:
+                self._failed(chunk.items, chunk.error) # type: ignore
+
+    def _failed(self, g_entities: 'List[GEntity]', error: 'Exception') -> 'None':
+        self.failed += len(g_entities)
+        if self.on_failure is None:
+            return
+
+        # a broken callback must not stop the flusher.
+        try:
+            self.on_failure(g_entities, error)
+        except Exception:
+            pass
+
+    def flush(self) -> 'None':
+        # waits for everything queued so far to be written.
+        if self._thread is None:
+            return
+        self._start()
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self) -> 'None':
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._closing = True
+        self._queue.put(_STOP)
+        thread.join()
+
+    def __len__(self) -> 'int':
+        return self._queue.qsize()
+
+    def __repr__(self) -> 'str':
+        return (
+            f"<WriteBehindQueue - pending: {len(self)}, "
+            f"written: {self.written}, failed: {self.failed}>"
+        )
+
+
+def _reset_queues() -> 'None':
+    for queue in list(_queues):
+        queue._reset()
+
+
+write_behind_queue = WriteBehindQueue()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_queues)
@@ -0,0 +1,88 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+import noseiquela_orm
+
+from .utils import Sample, fake_fetch, fake_get_multi, mount_samples
+
+# the event loops wake themselves up through a local socket pair.
+pytestmark = pytest.mark.enable_socket
+
+
+ENTITIES = mount_samples(range(10, 15))
+
+
+def test_async_get_runs_concurrently():
+    async def main():
+        return await asyncio.gather(
+            Sample.aget(10),
+            Sample.aget(11),
+            Sample.aget_multi([12, 42]),
+        )
+
+    with fake_get_multi(ENTITIES) as get_multi:
+        first, second, multi = asyncio.run(main())
+
+    assert get_multi.call_count == 3
+    assert (first.id, second.id) == (10, 11)
+    assert [sample and sample.int_prop for sample in multi] == [12, None]
+
+
+def test_async_get_cancellation():
+    async def main():
+        task = asyncio.ensure_future(Sample.aget(10))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    with fake_get_multi(ENTITIES, delay=0.2):
+        asyncio.run(asyncio.wait_for(main(), timeout=0.15))
+
+
+def test_async_save_keeps_the_session():
+    async def main():
+        with noseiquela_orm.session():
+            sample = await Sample.aget(10)
+            assert await Sample.aget(10) is sample
+
+            sample.int_prop = 100
+            await sample.asave()
+            await Sample.asave_multi([Sample(id=20)])
+            put_multi.assert_not_called()
+
+    with fake_get_multi(ENTITIES) as get_multi, mock.patch.object(
+        Sample._client._client, 'put_multi', return_value=None
+    ) as put_multi:
+        asyncio.run(main())
+
+    assert get_multi.call_count == 1
+    assert [
+        entity.key.id for entity in put_multi.call_args.kwargs["entities"]
+    ] == [10, 20]
+
+
+def test_async_query_iteration():
+    async def main():
+        return [
+            sample.id async for sample in Sample.query.filter(int_prop__gt=0)
+        ]
+
+    with fake_fetch(ENTITIES):
+        out = asyncio.run(main())
+
+    assert out == [10, 11, 12, 13, 14]
+
+
+def test_async_client_iterate_in_batches():
+    items = iter(range(5))
+    aio = Sample._client.aio
+
+    async def main():
+        with mock.patch.object(aio, 'run', wraps=aio.run) as run:
+            out = [item async for item in aio.iterate(items, batch_size=2)]
+        return out, run.call_count
+
+    assert asyncio.run(main()) == ([0, 1, 2, 3, 4], 4)
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from noseiquela_orm.utils.background import interleaved, prefetched
+
+
+def test_prefetched_keeps_the_order():
+    assert list(prefetched(iter(range(100)), size=3)) == list(range(100))
+    assert list(prefetched([], size=1)) == []
+
+
+def test_prefetched_reraises_producer_errors():
+    def items():
+        yield 1
+        raise KeyError("some error")
+
+    out = prefetched(items(), size=2)
+
+    assert next(out) == 1
+    with pytest.raises(KeyError):
+        next(out)
+
+
+def test_prefetched_is_bounded_and_stops_early():
+    produced = []
+
+    def items():
+        for item in range(100):
+            produced.append(item)
+            yield item
+
+    out = prefetched(items(), size=2)
+    assert next(out) == 0
+
+    time.sleep(0.2)
+    # the consumed item, the buffered ones and the one waiting for space
+    assert len(produced) <= 4
+
+    out.close()
+    time.sleep(0.3)
+    assert len(produced) <= 4
+
+
+def test_prefetched_with_invalid_size():
+    with pytest.raises(ValueError):
+        list(prefetched([1], size=0))
+
+
+def test_interleaved_consumes_all_the_iterables():
+    iterables = [range(0, 50), range(50, 60), [], range(60, 100)]
+
+    out = list(interleaved(iterables, max_workers=2, size=5))
+
+    assert sorted(out) == list(range(100))
+    assert [item for item in out if item < 50] == list(range(50))
+    assert list(interleaved([], max_workers=2, size=1)) == []
+
+
+def test_interleaved_reraises_errors():
+    def items():
+        yield 1
+        raise KeyError("some error")
+
+    with pytest.raises(KeyError):
+        list(interleaved([items(), range(10)], max_workers=2, size=2))
+
+    with pytest.raises(ValueError):
+        list(interleaved([range(10)], max_workers=0, size=2))
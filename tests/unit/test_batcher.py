@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+
+import pytest
+
+from noseiquela_orm.batcher import Batcher
+
+
+def test_batcher_coalesces_concurrent_calls():
+    batches = []
+
+    def process(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = Batcher(process, max_batch=10, max_wait=0.05)
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        results = list(executor.map(
+            lambda item: batcher.submit(item).result(), range(20)
+        ))
+
+    assert results == [item * 2 for item in range(20)]
+    assert sum(len(batch) for batch in batches) == 20
+    assert len(batches) < 20
+    assert max(len(batch) for batch in batches) <= 10
+
+
+def test_batcher_routes_the_errors():
+    def process(items):
+        if "all" in items:
+            raise RuntimeError("batch failed")
+        return [ValueError(item) if item == "bad" else item for item in items]
+
+    batcher = Batcher(process, max_batch=10, max_wait=0.01)
+    good, bad = batcher.submit("good"), batcher.submit("bad")
+
+    assert good.result() == "good"
+    with pytest.raises(ValueError):
+        bad.result()
+
+    with pytest.raises(RuntimeError):
+        batcher.submit("all").result()
+
+
+def test_batcher_keeps_the_same_key_out_of_a_batch():
+    batches = []
+    started = Event()
+
+    def process(items):
+        batches.append(items)
+        started.wait(1)
+        return items
+
+    batcher = Batcher(process, max_batch=10, max_wait=0.01, key_of=lambda item: item[0])
+    futures = [batcher.submit(item) for item in ("a1", "b1", "a2", "c1")]
+    started.set()
+
+    assert [future.result() for future in futures] == ["a1", "b1", "a2", "c1"]
+    assert batches == [["a1", "b1", "c1"], ["a2"]]
+
+
+@pytest.mark.parametrize("args", [{"max_batch": 0}, {"max_batch": 1, "max_wait": -1}])
+def test_batcher_invalid_args(args):
+    with pytest.raises(ValueError):
+        Batcher(lambda items: items, **args)
@@ -0,0 +1,221 @@
+import os
+from unittest import mock
+
+import pytest
+
+from noseiquela_orm.cache import (
+    CacheBackend, EntityCache, MemoryBackend, SharedMemoryBackend
+)
+
+from .utils import mount_entity, mount_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "shared_memory"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryBackend()
+        return
+
+    backend = SharedMemoryBackend(str(tmp_path / "cache"), slots=64, slot_size=256)
+    yield backend
+    backend.close()
+
+
+def test_cache_backend_lease_and_fill(backend):
+    token = backend.lease(b"a")
+
+    assert backend.lease(b"a") is None  # already leased
+    assert not backend.fill(b"a", token + 1, b"value")
+    assert backend.fill(b"a", token, b"value")
+    assert backend.get(b"a") == b"value"
+    assert backend.lease(b"a") is None  # already filled
+
+
+def test_cache_backend_lock_drops_the_leases(backend):
+    backend.fill(b"a", backend.lease(b"a"), b"old")
+    token = backend.lease(b"b")
+
+    backend.lock([b"a", b"b"])
+
+    assert backend.get(b"a") is None
+    assert backend.lease(b"a") is None
+    assert not backend.fill(b"b", token, b"stale")
+
+    backend.unlock([b"a", b"b"])
+
+    assert backend.get(b"b") is None
+    assert backend.fill(b"a", backend.lease(b"a"), b"new")
+    assert backend.get(b"a") == b"new"
+
+
+def test_cache_backend_fill_with_none_releases_the_lease(backend):
+    assert backend.fill(b"a", backend.lease(b"a"), None)
+    assert backend.get(b"a") is None
+    assert backend.lease(b"a") is not None
+
+    backend.clear()
+    assert backend.lease(b"a") is not None
+
+
+def test_cache_backend_must_implement_the_interface():
+    class IncompleteBackend(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
+
+
+def test_memory_backend_lru_eviction():
+    backend = MemoryBackend(max_size=2)
+
+    for key in (b"a", b"b"):
+        backend.fill(key, backend.lease(key), key)
+    assert backend.get(b"a") == b"a"  # "b" is the least recently used now
+    backend.fill(b"c", backend.lease(b"c"), b"c")
+
+    assert backend.get(b"b") is None
+    assert backend.get(b"a") == b"a" and backend.get(b"c") == b"c"
+    assert len(backend) == 2
+    assert backend.stats.evictions == 1
+
+
+def test_memory_backend_ttl():
+    clock = FakeClock()
+    backend = MemoryBackend(ttl=10, clock=clock)
+
+    backend.fill(b"a", backend.lease(b"a"), b"value")
+    clock.now = 9.9
+    assert backend.get(b"a") == b"value"
+
+    clock.now = 10
+    assert backend.get(b"a") is None
+    assert len(backend) == 0
+    assert backend.stats.expirations == 1
+
+
+def test_shared_memory_backend_is_shared_by_the_file(tmp_path):
+    path = str(tmp_path / "cache")
+    first = SharedMemoryBackend(path, slots=8, slot_size=128)
+    second = SharedMemoryBackend(path, slots=8, slot_size=128)
+
+    token = first.lease(b"a")
+    assert second.lease(b"a") is None
+    assert first.fill(b"a", token, b"value")
+    assert second.get(b"a") == b"value"
+
+    second.lock([b"a"])
+    assert first.get(b"a") is None
+
+    # values bigger than the slots are not cached.
+    assert not first.fill(b"b", first.lease(b"b"), b"x" * 128)
+    assert first.get(b"b") is None and first.lease(b"b") is not None
+    assert len(first) == 0
+
+    with pytest.raises(ValueError):
+        SharedMemoryBackend(path, slots=16, slot_size=128)
+
+    first.close()
+    second.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_shared_memory_backend_excludes_forked_processes(tmp_path):
+    import fcntl
+
+    backend = SharedMemoryBackend(str(tmp_path / "cache"), slots=8, slot_size=128)
+
+    with backend._locked():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                fcntl.flock(backend._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os._exit(0)  # waits for the parent
+            os._exit(1)
+
+        _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    backend.close()
+
+
+def test_shared_memory_backend_keeps_colliding_locks(tmp_path):
+    backend = SharedMemoryBackend(str(tmp_path / "cache"), slots=1, slot_size=128)
+
+    backend.fill(b"a", backend.lease(b"a"), b"value")
+    assert backend.lease(b"b") is not None  # evicts "a"
+    assert backend.stats.evictions == 1
+
+    backend.lock([b"a", b"b"])
+    backend.unlock([b"a"])
+
+    # "b" is still being written.
+    assert backend.lease(b"b") is None
+    backend.close()
+
+
+def test_entity_cache_get_multi():
+    cache = EntityCache(MemoryBackend())
+    parent_key = mount_key("ParentSample", 1)
+    entities = {
+        10: mount_entity("CacheSample", 10, parent_key, list_prop=[1]),
+        11: mount_entity("CacheSample", 11, parent_key, dict_prop={"a": 1}),
+    }
+    keys = [mount_key("CacheSample", id, parent_key) for id in (10, 11, 12)]
+
+    fetch = mock.Mock(side_effect=lambda keys: [
+        entities.get(key.id_or_name) for key in keys
+    ])
+
+    first = cache.get_multi(keys, fetch)
+    first[0]["list_prop"].append(2)
+    second = cache.get_multi(keys, fetch)
+
+    assert fetch.call_count == 2
+    assert fetch.call_args.args[0] == [keys[2]]
+    assert second[0]["list_prop"] == [1]
+    assert second[0].key == keys[0]
+    assert dict(second[1]["dict_prop"]) == {"a": 1}
+    assert second[2] is None
+    assert (cache.stats.hits, cache.stats.misses) == (2, 4)
+
+    with cache.writing([keys[0], mount_key("CacheSample", None)]):
+        assert cache.get_multi(keys[:1], fetch)[0] is entities[10]
+    assert fetch.call_count == 3
+
+
+def test_query_cache():
+    from noseiquela_orm.cache import QueryCache, dump_entity
+
+    clock = FakeClock()
+    cache = QueryCache(max_size=2, max_results=2, clock=clock)
+    kind, other_kind = ("project", None, "Kind"), ("project", None, "Other")
+    values = [dump_entity(mount_entity("Kind", 10, list_prop=[1]))]
+
+    assert cache.set(kind, "a", values, ttl=10, generation=0)
+    assert cache.get(kind, "a")[0]["list_prop"] == [1]
+    assert not cache.set(kind, "b", values * 3, ttl=10, generation=0)
+
+    # a write while the query was being read.
+    generation = cache.generation(kind)
+    cache.invalidate(kind)
+    assert not cache.set(kind, "b", values, ttl=10, generation=generation)
+    assert cache.get(kind, "a") is None
+
+    cache.set(kind, "a", values, ttl=10, generation=cache.generation(kind))
+    cache.set(other_kind, "a", values, ttl=20, generation=0)
+    cache.invalidate(other_kind)
+    assert cache.get(kind, "a") is not None
+
+    clock.now = 10
+    assert cache.get(kind, "a") is None
+    assert cache.stats.expirations == 1
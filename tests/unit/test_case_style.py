@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 
 from noseiquela_orm.utils.case_style import CaseStyle
@@ -79,3 +81,30 @@ def test_case_style_reverse(
 ):
     out = CaseStyle(from_case=from_case, to_case=to_case)
     assert out.revert(initial_str) == expected_str
+
+
+def test_case_style_cache():
+    out = CaseStyle(from_case="snake_case", to_case="camel_case", max_cache_size=2)
+
+    with mock.patch.object(
+        CaseStyle, '_from_case_style', wraps=CaseStyle._from_case_style
+    ) as from_case_style:
+        assert out("some_prop") == "someProp"
+        assert out("some_prop") == "someProp"
+        assert out.revert("someProp") == "some_prop"
+        assert out.revert("someProp") == "some_prop"
+
+    assert from_case_style.call_count == 2
+
+    out("other_prop")
+    out("another_prop")
+
+    assert len(out._converted) <= out.max_cache_size
+
+
+def test_case_style_warm():
+    out = CaseStyle(from_case="snake_case", to_case="pascal_case")
+    out.warm(["some_prop", "other_prop"])
+
+    assert out._converted == {"some_prop": "SomeProp", "other_prop": "OtherProp"}
+    assert out._reverted == {"SomeProp": "some_prop", "OtherProp": "other_prop"}
@@ -0,0 +1,107 @@
+import gzip
+import json
+from unittest import mock
+
+import pytest
+
+from noseiquela_orm.cli import load_model, main
+
+from .utils import Sample, fake_fetch, mount_samples
+
+
+MODEL_PATH = f"{Sample.__module__}:Sample"
+ENTITIES = mount_samples(range(1, 6))
+
+
+def test_load_model():
+    assert load_model(MODEL_PATH) is Sample
+
+    with pytest.raises(ValueError):
+        load_model(f"{__name__}")
+
+    with pytest.raises(ValueError):
+        load_model(f"{__name__}:ENTITIES")
+
+
+def test_export_command(tmp_path):
+    output = tmp_path / "out.ndjson.gz"
+
+    with fake_fetch(ENTITIES):
+        out = main([
+            "export", MODEL_PATH,
+            "--output", str(output),
+            "--page-size", "2",
+        ])
+
+    with gzip.open(output, "rt") as output_file:
+        rows = [json.loads(line) for line in output_file]
+
+    assert out == 0
+    assert rows == [{"id": idx, "int_prop": idx} for idx in range(1, 6)]
+
+
+def test_export_command_resumes_from_checkpoint(tmp_path):
+    output = tmp_path / "out.csv"
+    checkpoint = tmp_path / "checkpoint"
+    output.write_text("id\n1\n2\n")
+    checkpoint.write_text("2")
+
+    with fake_fetch(ENTITIES):
+        main([
+            "export", MODEL_PATH,
+            "--output", str(output),
+            "--format", "csv",
+            "--fields", "id",
+            "--page-size", "2",
+            "--checkpoint", str(checkpoint),
+        ])
+
+    assert output.read_text().splitlines() == ["id", "1", "2", "3", "4", "5"]
+    assert not checkpoint.exists()
+
+
+def test_export_command_resumes_a_killed_gzip_export(tmp_path):
+    output = tmp_path / "out.ndjson.gz"
+    checkpoint = tmp_path / "checkpoint"
+
+    # the first page was checkpointed, the second one was being
+    # written when the export was killed (no gzip trailer).
+    first_page = gzip.compress(b'{"id": 1, "int_prop": 1}\n{"id": 2, "int_prop": 2}\n')
+    second_page = gzip.compress(b'{"id": 3, "int_prop": 3}\n')
+    output.write_bytes(first_page + second_page[:-8])
+    checkpoint.write_text(f"2\n{len(first_page)}")
+
+    with fake_fetch(ENTITIES):
+        main([
+            "export", MODEL_PATH,
+            "--output", str(output),
+            "--page-size", "2",
+            "--checkpoint", str(checkpoint),
+        ])
+
+    with gzip.open(output, "rt") as output_file:
+        rows = [json.loads(line) for line in output_file]
+
+    assert rows == [{"id": idx, "int_prop": idx} for idx in range(1, 6)]
+    assert not checkpoint.exists()
+
+
+def test_export_command_saves_the_output_size_in_the_checkpoint(tmp_path):
+    output = tmp_path / "out.csv"
+    checkpoint = tmp_path / "checkpoint"
+    saved = []
+
+    with fake_fetch(ENTITIES), mock.patch(
+        'noseiquela_orm.cli.write_checkpoint',
+        side_effect=lambda path, value: saved.append(value)
+    ):
+        main([
+            "export", MODEL_PATH,
+            "--output", str(output),
+            "--format", "csv",
+            "--fields", "id",
+            "--page-size", "2",
+            "--checkpoint", str(checkpoint),
+        ])
+
+    assert saved == ["2\n10", "4\n16", None]  # "id\r\n1\r\n2\r\n" + "3\r\n4\r\n"
@@ -2,6 +2,7 @@ import os
 from unittest import mock
 
 import pytest
+from google.api_core.exceptions import InvalidArgument, ServiceUnavailable
 from google.cloud.datastore.query import Query as GQuery
 
 from noseiquela_orm.client import DatastoreClient
@@ -60,3 +61,192 @@ def test_datastore_client_get_partial_query():
     assert isinstance(out, GQuery)
     assert out.project == os.environ['DATASTORE_PROJECT_ID']
     assert out.kind == kind
+
+
+def test_datastore_client_is_created_lazily():
+    with mock.patch(
+        'google.cloud.datastore.Client'
+    ) as g_client:
+        out = DatastoreClient(project="lazy-project")
+        g_client.assert_not_called()
+
+        out.get_partial_query("some-kind")
+        out.get_partial_query("other-kind")
+        g_client.assert_called_once()
+
+
+def test_client_pool_shares_clients_with_equivalent_args():
+    from noseiquela_orm.client import ClientPool
+
+    pool = ClientPool()
+
+    first = pool.get(project="some-project", namespace="some-namespace")
+    second = pool.get(namespace="some-namespace", project="some-project")
+    other = pool.get(project="some-project", namespace="other-namespace")
+    default = pool.get()
+    with_options = pool.get(client_options={"api_endpoint": "localhost:8081"})
+
+    assert first is second
+    assert first is not other
+    assert default is pool.get(project=None)
+    assert with_options is pool.get(client_options={"api_endpoint": "localhost:8081"})
+    assert with_options is not pool.get(client_options={"api_endpoint": "localhost:8082"})
+    assert len(pool) == 5
+
+
+def test_client_pool_set_and_reset():
+    from noseiquela_orm.client import ClientPool
+
+    pool = ClientPool()
+    custom_client = DatastoreClient(project="custom-project")
+    original = pool.get(project="custom-project")
+    version = pool.version
+
+    pool.set(custom_client, project="custom-project")
+
+    assert pool.get(project="custom-project") is custom_client
+    assert pool.version > version
+
+    pool.reset()
+
+    assert len(pool) == 0
+    assert pool.get(project="custom-project") not in (original, custom_client)
+
+
+def test_datastore_client_bulk_save_in_chunks():
+    from noseiquela_orm.client import MAX_MUTATIONS_PER_COMMIT
+
+    entities = [
+        mount_entity("some-kind", idx, first_prop=idx)
+        for idx in range(1, (2 * MAX_MUTATIONS_PER_COMMIT) + 2)
+    ]
+
+    client = DatastoreClient()
+    with mock.patch.object(
+        client._client, 'put_multi'
+    ) as put_multi:
+        out = client.bulk_save(entities, max_workers=2)
+
+    assert put_multi.call_count == 3
+    assert [len(chunk.items) for chunk in out.chunks] == [
+        MAX_MUTATIONS_PER_COMMIT, MAX_MUTATIONS_PER_COMMIT, 1
+    ]
+    assert out.ok
+    assert out.items == entities
+
+
+def test_datastore_client_bulk_save_with_failed_chunk():
+    from noseiquela_orm.client import MAX_MUTATIONS_PER_COMMIT
+
+    entities = [
+        mount_entity("some-kind", idx, first_prop=idx)
+        for idx in range(1, MAX_MUTATIONS_PER_COMMIT + 2)
+    ]
+    error = ValueError("some error")
+
+    def put_multi(entities, retry, timeout):
+        if len(entities) == 1:
+            raise error
+
+    client = DatastoreClient()
+    with mock.patch.object(
+        client._client, 'put_multi', side_effect=put_multi
+    ):
+        out = client.bulk_save(entities)
+
+    assert not out.ok
+    assert len(out.failures) == 1
+    assert out.failures[0].index == 1
+    assert out.failures[0].error is error
+    assert out.failures[0].items == entities[-1:]
+    assert out.items == entities[:-1]
+
+
+def test_datastore_client_bulk_delete_in_chunks():
+    from noseiquela_orm.client import MAX_MUTATIONS_PER_COMMIT
+
+    client = DatastoreClient()
+    keys = [
+        client.mount_complete_g_key("some-kind", idx)
+        for idx in range(1, MAX_MUTATIONS_PER_COMMIT + 2)
+    ]
+    error = ValueError("some error")
+
+    def delete_multi(keys, retry, timeout):
+        if len(keys) == 1:
+            raise error
+
+    with mock.patch.object(
+        client._client, 'delete_multi', side_effect=delete_multi
+    ) as g_delete_multi:
+        out = client.bulk_delete(keys, max_workers=2)
+
+    assert g_delete_multi.call_count == 2
+    assert out.items == keys[:-1]
+    assert out.failures[0].error is error
+
+
+def test_datastore_client_get_multi():
+    from noseiquela_orm.client import MAX_KEYS_PER_LOOKUP
+
+    entities = {
+        idx: mount_entity("some-kind", idx, first_prop=idx)
+        for idx in range(1, MAX_KEYS_PER_LOOKUP + 11)
+        if idx % 3
+    }
+    keys = [
+        mount_entity("some-kind", idx).key
+        for idx in reversed(range(1, MAX_KEYS_PER_LOOKUP + 11))
+    ]
+    calls = []
+
+    def get_multi(keys, deferred, retry, timeout):
+        calls.append(len(keys))
+        # the first key of each request is deferred once
+        if len(calls) <= 2:
+            deferred.append(keys[0])
+            keys = keys[1:]
+        return [
+            entities[key.id] for key in keys if key.id in entities
+        ]
+
+    client = DatastoreClient()
+    with mock.patch.object(
+        client._client, 'get_multi', side_effect=get_multi
+    ):
+        out = client.get_multi(keys, max_workers=1)
+
+    assert sorted(calls) == [1, 1, 10, MAX_KEYS_PER_LOOKUP]
+    assert out == [entities.get(key.id) for key in keys]
+    assert out[-3] is None
+
+
+def test_datastore_client_save_batch_isolates_the_failed_entities():
+    client = DatastoreClient()
+    entities = [mount_entity("BatchSample", idx, value=idx) for idx in range(10, 13)]
+
+    def put_multi(entities, retry, timeout):
+        if any(entity["value"] == 11 for entity in entities):
+            raise InvalidArgument("invalid entity")
+
+    with mock.patch.object(
+        client._client, 'put_multi', side_effect=put_multi
+    ) as g_put_multi:
+        outcomes = client._save_batch(entities)
+
+    assert g_put_multi.call_count == 4
+    assert outcomes[0] == entities[0].key and outcomes[2] == entities[2].key
+    assert isinstance(outcomes[1], InvalidArgument)
+
+
+def test_datastore_client_save_batch_fails_whole_on_transient_errors():
+    client = DatastoreClient()
+    entities = [mount_entity("BatchSample", idx, value=idx) for idx in range(10, 13)]
+
+    with mock.patch.object(
+        client._client, 'put_multi', side_effect=ServiceUnavailable("try again")
+    ) as g_put_multi:
+        outcomes = client._save_batch(entities)
+
+    assert g_put_multi.call_count == 1
+    assert all(isinstance(outcome, ServiceUnavailable) for outcome in outcomes)
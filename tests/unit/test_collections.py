@@ -1,6 +1,6 @@
 import pytest
 
-from noseiquela_orm.utils.collections import merge_dicts
+from noseiquela_orm.utils.collections import chunked, merge_dicts
 
 
 @pytest.mark.parametrize(
@@ -15,3 +15,27 @@ from noseiquela_orm.utils.collections import merge_dicts
 )
 def test_merge_dicts(left, right, expected):
     assert merge_dicts(left, right) == expected
+
+
+@pytest.mark.parametrize(
+    ("items", "max_items", "max_size", "expected"),
+    [
+        ([], 2, None, []),
+        ([1, 2, 3, 4, 5], 2, None, [[1, 2], [3, 4], [5]]),
+        ([1, 2, 3], 5, None, [[1, 2, 3]]),
+        (["aa", "b", "cc", "ddd"], 10, 3, [["aa", "b"], ["cc"], ["ddd"]]),
+        (["aaaa", "b", "c"], 2, 3, [["aaaa"], ["b", "c"]]),
+    ],
+)
+def test_chunked(items, max_items, max_size, expected):
+    assert list(chunked(
+        items,
+        max_items=max_items,
+        max_size=max_size,
+        size_of=len,
+    )) == expected
+
+
+def test_chunked_with_invalid_max_items():
+    with pytest.raises(ValueError):
+        list(chunked([1, 2], max_items=0))
@@ -1,9 +1,12 @@
+import copy
 import os
+import pickle
 from unittest import mock
 
 import pytest
 
 from noseiquela_orm.entity import Model
+from noseiquela_orm.types.properties import IntegerProperty, ListProperty
 
 from .utils import mount_entity, mount_key
 
@@ -767,3 +770,538 @@ def test_model_base_mount_entity_key_with_no_parent():
 
 #     with pytest.raises(Exception, match="Parent key must be complete."):
 #         sample.mount_entity_key()
+
+
+def test_model_base_shares_pooled_client():
+    from noseiquela_orm.client import DatastoreClient, client_pool
+
+    class ModelSample(Model):
+        class Meta:
+            namespace = "shared-namespace"
+
+    class OtherModelSample(Model):
+        class Meta:
+            namespace = "shared-namespace"
+
+    class DefaultModelSample(Model):
+        ...
+
+    assert ModelSample._client is OtherModelSample._client
+    assert ModelSample._client is not DefaultModelSample._client
+
+    custom_client = DatastoreClient(namespace="shared-namespace")
+    client_pool.set(custom_client, namespace="shared-namespace")
+
+    assert ModelSample._client is OtherModelSample._client is custom_client
+    assert ModelSample.namespace == "shared-namespace"
+
+
+def test_model_base_save_multi():
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+    samples = [ModelSample(int_prop=idx) for idx in range(3)]
+    samples.append(ModelSample(id="some-name", int_prop=3))
+
+    def put_multi(entities, retry, timeout):
+        for idx, entity in enumerate(entities):
+            if entity.key.is_partial:
+                entity.key = entity.key.completed_key(idx + 1)
+
+    with mock.patch.object(
+        ModelSample._client._client, 'put_multi', side_effect=put_multi
+    ):
+        out = ModelSample.save_multi(samples)
+
+    assert out.ok
+    assert [sample.id for sample in samples] == [1, 2, 3, "some-name"]
+
+    class OtherModelSample(Model):
+        ...
+
+    with pytest.raises(ValueError):
+        ModelSample.save_multi([OtherModelSample()])
+
+
+def test_model_base_get_and_get_multi():
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+    entities = {
+        1: mount_entity(ModelSample.kind, 1, int_prop=10),
+        "some-name": mount_entity(ModelSample.kind, "some-name", int_prop=20),
+    }
+
+    def get_multi(keys, deferred, retry, timeout):
+        return [
+            entities[key.id_or_name] for key in keys
+            if key.id_or_name in entities
+        ]
+
+    with mock.patch.object(
+        ModelSample._client._client, 'get_multi', side_effect=get_multi
+    ):
+        sample = ModelSample.get(1)
+        out = ModelSample.get_multi(["some-name", 42, 1])
+
+        with pytest.raises(ValueError):
+            ModelSample.get(1, parent_id=13)
+
+    assert sample.id == 1 and sample.int_prop == 10
+    assert [item and item.id for item in out] == ["some-name", None, 1]
+    assert out[0].int_prop == 20
+
+
+def test_model_base_get_multi_with_parent():
+    from noseiquela_orm.types.key import KeyProperty
+
+    class ParentModel(Model):
+        ...
+
+    class ModelSample(Model):
+        id = KeyProperty(parent=ParentModel)
+
+    parent_key = mount_key(ParentModel.kind, 13)
+    entity = mount_entity(ModelSample.kind, 42, parent_key)
+
+    with mock.patch.object(
+        ModelSample._client._client, 'get_multi', return_value=[entity]
+    ) as get_multi:
+        out = ModelSample.get_multi([(13, 42), 7], parent_id=13)
+
+        with pytest.raises(ValueError):
+            ModelSample.get(42)
+
+    requested_keys = get_multi.call_args.kwargs["keys"]
+    assert requested_keys == [entity.key, mount_key(ModelSample.kind, 7, parent_key)]
+    assert out[0].id == 42 and out[0].parent_id == 13
+    assert out[1] is None
+
+
+def test_model_base_get_with_cache():
+    from noseiquela_orm.types.properties import IntegerProperty, ListProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+        list_prop = ListProperty()
+
+        class Meta:
+            cache_size = 10
+            cache_ttl = 60
+
+    entities = {
+        1: mount_entity(ModelSample.kind, 1, int_prop=10, list_prop=[1]),
+        2: mount_entity(ModelSample.kind, 2, int_prop=20, list_prop=[2]),
+    }
+
+    def get_multi(keys, deferred, retry, timeout):
+        return [
+            entities[key.id_or_name] for key in keys
+            if key.id_or_name in entities
+        ]
+
+    with mock.patch.object(
+        ModelSample._client._client, 'get_multi', side_effect=get_multi
+    ) as g_get_multi:
+        first = ModelSample.get(1)
+        first.list_prop.append(100)
+
+        out = ModelSample.get_multi([2, 1, 42])
+        assert [
+            key.id_or_name for key in g_get_multi.call_args.kwargs["keys"]
+        ] == [2, 42]
+
+        with mock.patch.object(
+            ModelSample._client._client, 'put_multi', return_value=None
+        ):
+            out[1].save(force=True)
+
+        ModelSample.get(1)
+
+    assert g_get_multi.call_count == 3
+    assert [item and item.as_dict() for item in out] == [
+        {"id": 2, "int_prop": 20, "list_prop": [2]},
+        {"id": 1, "int_prop": 10, "list_prop": [1]},
+        None,
+    ]
+    stats = ModelSample.cache_stats()
+    assert (stats.hits, stats.misses) == (1, 4)
+
+
+def test_model_base_delete():
+    from noseiquela_orm import session
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+        class Meta:
+            cache_size = 10
+
+    entities = {
+        idx: mount_entity(ModelSample.kind, idx, int_prop=idx)
+        for idx in range(1, 4)
+    }
+
+    def get_multi(keys, deferred, retry, timeout):
+        return [
+            entities[key.id_or_name] for key in keys
+            if key.id_or_name in entities
+        ]
+
+    def delete_multi(keys, retry, timeout):
+        for key in keys:
+            entities.pop(key.id_or_name, None)
+
+    with mock.patch.object(
+        ModelSample._client._client, 'get_multi', side_effect=get_multi
+    ), mock.patch.object(
+        ModelSample._client._client, 'delete_multi', side_effect=delete_multi
+    ) as g_delete_multi:
+        deleted = ModelSample.get(1)
+        assert deleted.delete() == 1
+        assert ModelSample.get(1) is None
+        assert deleted.is_dirty  # a later save writes it again
+
+        out = ModelSample.delete_multi([2, 3])
+        assert out == 2
+        assert ModelSample.get_multi([2, 3]) == [None, None]
+
+        with session() as current:
+            sample = ModelSample(id=4, int_prop=4)
+            sample.save()
+            sample.delete()
+            assert current.get(sample._mount_entity_g_key()) is None
+            assert not current._pending
+
+        with pytest.raises(ValueError):
+            ModelSample(int_prop=5).delete()
+
+    assert g_delete_multi.call_count == 3
+
+
+def test_model_base_delete_multi_raises_the_failures():
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+    with mock.patch.object(
+        ModelSample._client._client, 'delete_multi',
+        side_effect=RuntimeError("commit failed")
+    ):
+        with pytest.raises(RuntimeError):
+            ModelSample.delete_multi([1, 2])
+
+
+def test_model_base_with_cache_backend():
+    from noseiquela_orm.cache import MemoryBackend
+
+    backend = MemoryBackend(max_size=5)
+
+    class ModelSample(Model):
+        class Meta:
+            cache_backend = backend
+            cache_size = 10
+
+    assert ModelSample._cache.backend is backend
+    assert ModelSample.cache_stats() is backend.stats
+
+
+def test_model_base_without_cache():
+    class ModelSample(Model):
+        ...
+
+    assert ModelSample._cache is None
+    assert ModelSample.cache_stats() is None
+
+
+def test_model_base_mount_from_google_entity_skips_validation_by_default():
+    from noseiquela_orm.types.properties import IntegerProperty, StringProperty
+
+    class ModelSample(Model):
+        __case_style__ = {"to_case": "camel_case"}
+
+        int_prop = IntegerProperty(required=True)
+        str_prop = StringProperty()
+
+    entity = mount_entity(ModelSample.kind, 1, intProp="not-an-int")
+
+    with mock.patch.object(
+        IntegerProperty, '_parse_and_validate'
+    ) as parse_and_validate:
+        sample = ModelSample._mount_from_google_entity(entity)
+
+    parse_and_validate.assert_not_called()
+    assert ModelSample._decoder == (
+        ("int_prop", "intProp", None),
+        ("str_prop", "strProp", None),
+    )
+    assert sample.as_dict() == {
+        "id": 1,
+        "int_prop": "not-an-int",
+        "str_prop": None,
+    }
+
+    with pytest.raises(ValueError):
+        ModelSample._mount_from_google_entity(entity, validate=True)
+
+
+def test_model_base_mount_from_google_entity_with_validate_on_load():
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        __validate_on_load__ = True
+
+        int_prop = IntegerProperty(required=True)
+
+    entity = mount_entity(ModelSample.kind, 1, int_prop="not-an-int")
+
+    with pytest.raises(ValueError):
+        ModelSample._mount_from_google_entity(entity)
+
+    sample = ModelSample._mount_from_google_entity(
+        mount_entity(ModelSample.kind, 1, int_prop=42)
+    )
+    assert sample.int_prop == 42
+
+
+def test_model_base_compiled_codecs():
+    from noseiquela_orm.types.key import KeyProperty
+    from noseiquela_orm.types.properties import DictProperty, IntegerProperty
+
+    class ParentModel(Model):
+        ...
+
+    class ModelSample(Model):
+        __case_style__ = {"to_case": "pascal_case"}
+
+        id = KeyProperty(parent=ParentModel)
+        int_prop = IntegerProperty()
+        dict_prop = DictProperty()
+
+    assert ModelSample._dict_props == ("id", "parent_id", "int_prop", "dict_prop")
+    assert [item[:2] for item in ModelSample._encoder] == [
+        ("int_prop", "IntProp"),
+        ("dict_prop", "DictProp"),
+    ]
+
+    sample = ModelSample(id=42, parent_id=13, int_prop=1)
+    entity = sample.as_entity()
+
+    assert dict(entity) == {"IntProp": 1}
+    assert entity.key == mount_key(
+        ModelSample.kind, 42, mount_key(ParentModel.kind, 13)
+    )
+    assert sample.as_dict() == {"id": 42, "parent_id": 13, "int_prop": 1}
+
+    from google.cloud.datastore.entity import Entity as GEntity
+
+    embedded = GEntity()
+    embedded.update({"a": 1})
+    entity["DictProp"] = embedded
+
+    loaded = ModelSample._mount_from_google_entity(entity)
+
+    assert type(loaded.dict_prop) is dict
+    assert loaded.as_dict() == {
+        "id": 42,
+        "parent_id": 13,
+        "int_prop": 1,
+        "dict_prop": {"a": 1},
+    }
+
+
+def test_model_base_compact_instances():
+    from noseiquela_orm.types.key import KeyProperty
+    from noseiquela_orm.types.properties import IntegerProperty, StringProperty
+
+    class ParentModel(Model):
+        ...
+
+    class ModelSample(Model):
+        __compact__ = True
+
+        id = KeyProperty(parent=ParentModel)
+        int_prop = IntegerProperty()
+        str_prop = StringProperty(default="some-str")
+
+    sample = ModelSample(id=42, parent_id=13, int_prop=1)
+
+    assert not hasattr(sample, "__dict__")
+    assert set(ModelSample.__slots__) == {
+        "_slot_id", "_slot_parent_id", "_slot_int_prop", "_slot_str_prop"
+    }
+    assert sample.int_prop == 1
+    assert sample.str_prop == "some-str"
+    assert sample.as_dict() == {
+        "id": 42, "parent_id": 13, "int_prop": 1, "str_prop": "some-str"
+    }
+    assert dict(sample.as_entity()) == {"int_prop": 1, "str_prop": "some-str"}
+
+    with pytest.raises(AttributeError):
+        sample.unknown_prop = 1
+
+    with pytest.raises(ValueError):
+        sample.int_prop = "not-an-int"
+
+    loaded = ModelSample._mount_from_google_entity(sample.as_entity())
+
+    assert not hasattr(loaded, "__dict__")
+    assert loaded.as_dict() == sample.as_dict()
+
+    empty = ModelSample()
+    assert empty.int_prop is None
+    assert empty.as_dict() == {"id": None, "parent_id": None, "str_prop": "some-str"}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_model_base_dirty_tracking(compact):
+    from noseiquela_orm.types.properties import IntegerProperty, ListProperty
+
+    class ModelSample(Model):
+        __compact__ = compact
+
+        int_prop = IntegerProperty()
+        list_prop = ListProperty()
+
+    new_sample = ModelSample(int_prop=1)
+    assert new_sample.is_dirty
+    assert new_sample.changed_fields == {"int_prop"}
+    # nothing is allocated for the tracking of new instances.
+    assert getattr(new_sample, "_changed", None) is None
+
+    sample = ModelSample._mount_from_google_entity(
+        mount_entity(ModelSample.kind, 10, int_prop=1, list_prop=[1])
+    )
+    assert not sample.is_dirty
+    assert sample.changed_fields == set()
+    assert sample._snapshot == (10, 1, [1])
+    assert sample._changed is None
+
+    sample.int_prop = 1
+    assert not sample.is_dirty
+
+    sample.int_prop = 2
+    sample.list_prop.append(2)
+    assert sample.changed_fields == {"int_prop", "list_prop"}
+
+    sample.int_prop = 1
+    sample.list_prop.pop()
+    assert not sample.is_dirty
+    assert "_snapshot" not in getattr(sample, "__dict__", {})
+
+
+class CopySample(Model):
+    int_prop = IntegerProperty()
+    list_prop = ListProperty()
+
+
+class CompactCopySample(Model):
+    __compact__ = True
+
+    int_prop = IntegerProperty()
+    list_prop = ListProperty()
+
+
+@pytest.mark.parametrize("model", [CopySample, CompactCopySample])
+@pytest.mark.parametrize("copy_instance", [
+    copy.copy,
+    copy.deepcopy,
+    lambda instance: pickle.loads(pickle.dumps(instance)),
+])
+def test_model_base_copy_and_pickle(model, copy_instance):
+    new_sample = model(id=1, int_prop=1)
+    loaded = model._mount_from_google_entity(
+        mount_entity(model.kind, 2, int_prop=2, list_prop=[2])
+    )
+    loaded.int_prop = 3
+
+    new_copy = copy_instance(new_sample)
+    loaded_copy = copy_instance(loaded)
+
+    assert new_copy.as_dict() == new_sample.as_dict()
+    assert new_copy.is_dirty
+    assert loaded_copy.as_dict() == loaded.as_dict()
+    assert loaded_copy.changed_fields == {"int_prop"}
+
+    loaded_copy.int_prop = 2
+    assert not loaded_copy.is_dirty
+    assert loaded.is_dirty
+
+
+def test_model_base_save_skips_clean_instances():
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+    loaded = [
+        ModelSample._mount_from_google_entity(
+            mount_entity(ModelSample.kind, idx, int_prop=idx)
+        )
+        for idx in (10, 11)
+    ]
+
+    with mock.patch.object(
+        ModelSample._client._client, 'put_multi', return_value=None
+    ) as put_multi:
+        loaded[0].save()
+        put_multi.assert_not_called()
+
+        loaded[0].save(force=True)
+        assert put_multi.call_count == 1
+
+        loaded[1].int_prop = 12
+        new_sample = ModelSample(id=13)
+        result = ModelSample.save_multi(loaded + [new_sample])
+
+        assert [
+            entity.key.id for entity in put_multi.call_args.kwargs["entities"]
+        ] == [11, 13]
+        assert len(result.items) == 2
+
+        loaded[1].save()
+        new_sample.save()
+        assert put_multi.call_count == 2
+
+    assert not loaded[1].is_dirty and not new_sample.is_dirty
+
+
+def test_model_base_with_batched_saves_and_gets():
+    from concurrent.futures import ThreadPoolExecutor
+    from noseiquela_orm.types.properties import IntegerProperty
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+        class Meta:
+            batch_saves = True
+            batch_gets = True
+
+    def put_multi(entities, retry, timeout):
+        for entity in entities:
+            if entity.key.is_partial:
+                entity.key = entity.key.completed_key(entity["int_prop"] + 1000)
+
+    def get_multi(keys, deferred, retry, timeout):
+        return [
+            mount_entity(ModelSample.kind, key.id_or_name, int_prop=key.id_or_name)
+            for key in keys
+        ]
+
+    samples = [ModelSample(int_prop=idx) for idx in range(50)]
+    with mock.patch.object(
+        ModelSample._client._client, 'put_multi', side_effect=put_multi
+    ) as g_put_multi, mock.patch.object(
+        ModelSample._client._client, 'get_multi', side_effect=get_multi
+    ) as g_get_multi, ThreadPoolExecutor(max_workers=50) as executor:
+        list(executor.map(lambda sample: sample.save(), samples))
+        loaded = list(executor.map(ModelSample.get, range(1, 51)))
+
+    assert [sample.id for sample in samples] == list(range(1000, 1050))
+    assert [sample.int_prop for sample in loaded] == list(range(1, 51))
+    assert g_put_multi.call_count < 50
+    assert g_get_multi.call_count < 50
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+import pytest
+
+from noseiquela_orm.entity import Model
+from noseiquela_orm.types.properties import (
+    BooleanProperty, IntegerProperty, ListProperty, StringProperty
+)
+
+
+class ImportSample(Model):
+    str_prop = StringProperty()
+    int_prop = IntegerProperty()
+    bool_prop = BooleanProperty()
+    list_prop = ListProperty()
+
+
+def fake_put_multi(fail_with=None):
+    saved = []
+
+    def put_multi(entities, retry, timeout):
+        if fail_with and any(
+            entity.get("str_prop") == fail_with for entity in entities
+        ):
+            raise ValueError("commit failed")
+        saved.extend(entities)
+
+    patcher = mock.patch.object(
+        ImportSample._client._client, 'put_multi', side_effect=put_multi
+    )
+    return patcher, saved
+
+
+def test_bulk_import_from_iterable():
+    rows = [{"str_prop": f"row-{idx}", "int_prop": idx} for idx in range(10)]
+    rows[3] = {"str_prop": "row-3", "int_prop": "3"}
+    rows[5] = {"str_prop": "row-5", "unknown_prop": 1}
+
+    patcher, saved = fake_put_multi(fail_with="row-8")
+    with patcher as put_multi:
+        report = ImportSample.bulk_import(rows, batch_size=3, workers=2)
+
+    assert report.imported == 6
+    assert [rejected.line for rejected in report.rejected] == [4, 6, 9, 10]
+    assert isinstance(report.rejected[0].error, ValueError)
+    assert str(report.rejected[-1].error) == "commit failed"
+    assert put_multi.call_count == 3
+    assert sorted(entity["str_prop"] for entity in saved) == [
+        "row-0", "row-1", "row-2", "row-4", "row-6", "row-7"
+    ]
+    assert not report.ok
+
+
+def test_bulk_import_from_csv_with_dead_letter_and_checkpoint(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text(
+        "id,str_prop,int_prop,bool_prop,list_prop\n"
+        "1,a,1,true,\"[1, 2]\"\n"
+        "2,b,not-an-int,false,\n"
+        "3,c,,0,\n"
+        "4,d,4,,\n"
+    )
+    dead_letter = tmp_path / "dead-letter.ndjson"
+    checkpoint = tmp_path / "checkpoint"
+    checkpoint.write_text("2")  # the line 2 was already imported
+
+    patcher, saved = fake_put_multi()
+    with patcher:
+        report = ImportSample.bulk_import(
+            str(path),
+            dead_letter=str(dead_letter),
+            checkpoint=str(checkpoint),
+        )
+
+    assert report.skipped == 1
+    assert report.imported == 2
+    assert [dict(entity) for entity in saved] == [
+        {"str_prop": "c", "int_prop": None, "bool_prop": False, "list_prop": None},
+        {"str_prop": "d", "int_prop": 4, "bool_prop": None, "list_prop": None},
+    ]
+    assert [entity.key.id for entity in saved] == [3, 4]
+    assert [
+        json.loads(line)["line"] for line in dead_letter.read_text().splitlines()
+    ] == [3]
+    assert not checkpoint.exists()
+
+
+def test_bulk_import_from_ndjson(tmp_path):
+    path = tmp_path / "rows.ndjson"
+    path.write_text("\n".join(
+        json.dumps({"str_prop": f"row-{idx}", "list_prop": [idx]})
+        for idx in range(3)
+    ) + "\n")
+
+    patcher, saved = fake_put_multi()
+    with patcher:
+        report = ImportSample.bulk_import(str(path))
+
+    assert report.ok
+    assert [entity["list_prop"] for entity in saved] == [[0], [1], [2]]
+
+    with pytest.raises(ValueError):
+        ImportSample.bulk_import(str(path), format="xml")
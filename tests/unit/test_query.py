@@ -0,0 +1,439 @@
+from datetime import datetime
+from unittest import mock
+
+import pytest
+
+from noseiquela_orm.entity import Model
+from noseiquela_orm.types.properties import IntegerProperty
+
+from .utils import FakeIterator, Sample, fake_fetch, mount_entity, mount_samples
+
+
+ENTITIES = mount_samples(range(1, 8), factor=10)
+
+
+def test_query_result_iteration():
+    with fake_fetch(ENTITIES) as fetch:
+        out = [sample.id for sample in Sample.query.all()]
+
+    assert out == [1, 2, 3, 4, 5, 6, 7]
+    assert fetch.call_count == 1
+
+
+def test_query_result_page():
+    with fake_fetch(ENTITIES):
+        result = Sample.query.all()
+        first_page = result.page(3)
+        second_page = result.page(3, start_cursor=first_page.next_cursor)
+        last_page = result.page(3, start_cursor=second_page.next_cursor)
+
+    assert [sample.id for sample in first_page] == [1, 2, 3]
+    assert first_page.next_cursor == "3"
+    assert [sample.id for sample in second_page] == [4, 5, 6]
+    assert [sample.id for sample in last_page] == [7]
+    assert last_page.next_cursor is None
+    assert not last_page.has_next
+
+    with pytest.raises(ValueError):
+        result.page(0)
+
+
+def test_query_accepts_cursors():
+    with fake_fetch(ENTITIES) as fetch:
+        out = [
+            sample.id for sample in Sample.query.filter(
+                int_prop__gt=0,
+                start_cursor="2",
+                end_cursor="5",
+            )
+        ]
+
+    assert out == [3, 4, 5, 6, 7]
+    assert fetch.call_args.kwargs["start_cursor"] == "2"
+    assert fetch.call_args.kwargs["end_cursor"] == "5"
+
+
+def test_query_result_keys_and_ids():
+    result = Sample.query.filter(int_prop__gt=0)
+
+    with fake_fetch(ENTITIES) as fetch, mock.patch.object(
+        Sample, '_mount_from_google_entity'
+    ) as mount:
+        keys = list(result.keys())
+        ids = list(result.ids())
+
+    assert keys == [entity.key for entity in ENTITIES]
+    assert ids == [1, 2, 3, 4, 5, 6, 7]
+    assert fetch.call_args.args[0].projection == ["__key__"]
+    assert result.query.projection == []
+    mount.assert_not_called()
+
+
+def test_query_result_delete():
+    result = Sample.query.filter(int_prop__gt=0)
+    deleted = []
+
+    with fake_fetch(ENTITIES) as fetch, mock.patch.object(
+        Sample._client._client, 'delete_multi',
+        side_effect=lambda keys, retry, timeout: deleted.extend(keys)
+    ), mock.patch(
+        'noseiquela_orm.query.MAX_MUTATIONS_PER_COMMIT', 2
+    ), mock.patch.object(
+        Sample, '_mount_from_google_entity'
+    ) as mount:
+        out = result.delete(max_workers=2)
+
+    assert out == 7
+    assert deleted == [entity.key for entity in ENTITIES]
+    assert fetch.call_args.args[0].projection == ["__key__"]
+    mount.assert_not_called()
+
+
+def test_query_result_delete_inside_a_transaction():
+    with mock.patch.object(Sample._client, 'transaction'):
+        with Sample.transaction():
+            with pytest.raises(ValueError):
+                Sample.query.all().delete()
+
+
+def test_query_result_ids_with_parent():
+    from noseiquela_orm.types.key import KeyProperty
+
+    class ChildQuerySample(Model):
+        id = KeyProperty(parent=Sample)
+
+    entities = [
+        mount_entity(ChildQuerySample.kind, idx + 10, ENTITIES[idx].key)
+        for idx in range(3)
+    ]
+
+    with fake_fetch(entities):
+        out = list(ChildQuerySample.query.all().ids())
+
+    assert out == [(1, 10), (2, 11), (3, 12)]
+
+
+def test_query_result_aggregations_without_server_support():
+    result = Sample.query.filter(int_prop__gt=0)
+
+    with fake_fetch(ENTITIES) as fetch, mock.patch.object(
+        Sample, '_mount_from_google_entity'
+    ) as mount:
+        count = result.count()
+        count_query = fetch.call_args.args[0]
+        total = result.sum("int_prop")
+        sum_query = fetch.call_args.args[0]
+        average = result.avg("int_prop")
+
+    assert (count, total, average) == (7, 280, 40)
+    assert count_query.projection == ["__key__"]
+    assert sum_query.projection == ["int_prop"]
+    mount.assert_not_called()
+
+    with fake_fetch([]):
+        assert result.avg("int_prop") is None
+
+    with pytest.raises(AttributeError):
+        result.sum("unknown_prop")
+
+
+def test_query_result_keys_with_distinct_on():
+    result = Sample.query.filter(distinct_on=("int_prop",))
+
+    with fake_fetch(ENTITIES) as fetch:
+        keys = list(result.keys())
+        keys_query = fetch.call_args.args[0]
+        result.sum("int_prop")
+        sum_query = fetch.call_args.args[0]
+
+    # the properties of 'distinct_on' must be projected.
+    assert keys == [entity.key for entity in ENTITIES]
+    assert keys_query.projection == ["int_prop"]
+    assert keys_query.distinct_on == ["int_prop"]
+    assert sum_query.projection == ["int_prop"]
+
+
+def test_query_result_aggregations_with_server_support():
+    result = Sample.query.filter(int_prop__gt=0)
+    aggregation_result = mock.Mock(alias="count", value=42)
+
+    g_client = result.query._client
+    with mock.patch.object(
+        g_client, 'aggregation_query', create=True
+    ) as aggregation_query, fake_fetch(ENTITIES) as fetch:
+        aggregation_query.return_value.fetch.return_value = [[aggregation_result]]
+        count = result.count()
+
+    assert count == 42
+    aggregation_query.assert_called_once_with(result.query)
+    aggregation_query.return_value.count.assert_called_once_with(alias="count")
+    fetch.assert_not_called()
+
+
+def test_query_result_iteration_with_prefetch():
+    with fake_fetch(ENTITIES, page_size=2):
+        out = [
+            sample.id for sample in Sample.query.all(prefetch=2)
+        ]
+        early_stop = []
+        for sample in Sample.query.filter(int_prop__gt=0, prefetch=1):
+            early_stop.append(sample.id)
+            if sample.id == 3:
+                break
+
+    assert out == [1, 2, 3, 4, 5, 6, 7]
+    assert early_stop == [1, 2, 3]
+
+    with pytest.raises(ValueError):
+        Sample.query.all(prefetch=-1)
+
+
+def test_query_result_to_columns():
+    from noseiquela_orm.types.properties import (
+        BooleanProperty, FloatProperty, StringProperty
+    )
+
+    class ColumnsSample(Model):
+        int_prop = IntegerProperty()
+        float_prop = FloatProperty()
+        bool_prop = BooleanProperty()
+        str_prop = StringProperty()
+
+    entities = [
+        mount_entity(ColumnsSample.kind, 1, int_prop=1, float_prop=1.5, bool_prop=True, str_prop="a"),
+        mount_entity(ColumnsSample.kind, 2, int_prop=None, float_prop=2.5, bool_prop=False),
+        mount_entity(ColumnsSample.kind, "name", int_prop=3, bool_prop=None, str_prop="c"),
+    ]
+
+    with fake_fetch(entities), mock.patch.object(
+        ColumnsSample, '_mount_from_google_entity'
+    ) as mount:
+        columns = ColumnsSample.query.all().to_columns()
+        partial_columns = ColumnsSample.query.all().to_columns(
+            fields=["int_prop"]
+        )
+
+    mount.assert_not_called()
+    assert len(columns) == 3
+    assert columns.fields == ("id", "int_prop", "float_prop", "bool_prop", "str_prop")
+    assert partial_columns.fields == ("int_prop",)
+    assert list(columns._buffers["int_prop"].values) == [1, 0, 3]
+    assert list(columns._buffers["int_prop"].mask) == [0, 1, 0]
+    assert columns._buffers["str_prop"].values == ["a", None, "c"]
+
+    with pytest.raises(AttributeError):
+        ColumnsSample.query.all().to_columns(fields=["unknown_prop"])
+
+    numpy = pytest.importorskip("numpy")
+
+    assert columns["int_prop"].dtype == numpy.int64
+    assert columns["float_prop"].tolist() == [1.5, 2.5, 0.0]
+    assert columns.mask("float_prop").tolist() == [False, False, True]
+    assert columns["bool_prop"].dtype == numpy.bool_
+    assert columns["id"].tolist() == [1, 2, "name"]
+
+    structured = columns.to_numpy()
+    assert structured["int_prop"].tolist() == [1, 0, 3]
+    assert structured.dtype.names == columns.fields
+
+    pandas = pytest.importorskip("pandas")
+
+    data_frame = columns.to_pandas()
+    assert str(data_frame["int_prop"].dtype) == "Int64"
+    assert data_frame["int_prop"].isna().tolist() == [False, True, False]
+    assert data_frame["str_prop"].isna().tolist() == [False, True, False]
+
+
+def test_query_result_export_ndjson_and_csv():
+    import io
+    import json
+
+    from noseiquela_orm.types.properties import DateTimeProperty, ListProperty
+
+    class ExportSample(Model):
+        int_prop = IntegerProperty()
+        list_prop = ListProperty()
+        date_prop = DateTimeProperty()
+
+    entities = [
+        mount_entity(ExportSample.kind, 1, int_prop=1, list_prop=[1, 2]),
+        mount_entity(ExportSample.kind, 2, int_prop=None),
+        mount_entity(ExportSample.kind, 3, int_prop=3, date_prop=datetime(2022, 1, 2)),
+    ]
+    cursors = []
+
+    with fake_fetch(entities):
+        ndjson = io.StringIO()
+        exported = ExportSample.query.all().export(
+            ndjson,
+            page_size=2,
+            checkpoint=cursors.append,
+        )
+
+        csv_output = io.StringIO()
+        ExportSample.query.all().export(
+            csv_output,
+            format="csv",
+            fields=["id", "list_prop", "date_prop"],
+        )
+
+        resumed = io.StringIO()
+        resumed_count = ExportSample.query.all(prefetch=1).export(
+            resumed,
+            format="csv",
+            fields=["id"],
+            page_size=2,
+            start_cursor=cursors[0],
+        )
+
+        with pytest.raises(ValueError):
+            ExportSample.query.all().export(io.StringIO(), format="xml")
+
+    assert exported == 3
+    assert cursors == ["2", None]
+    assert [json.loads(line) for line in ndjson.getvalue().splitlines()] == [
+        {"id": 1, "int_prop": 1, "list_prop": [1, 2], "date_prop": None},
+        {"id": 2, "int_prop": None, "list_prop": None, "date_prop": None},
+        {"id": 3, "int_prop": 3, "list_prop": None, "date_prop": "2022-01-02T00:00:00"},
+    ]
+    assert csv_output.getvalue().splitlines() == [
+        "id,list_prop,date_prop",
+        '1,"[1, 2]",',
+        "2,,",
+        "3,,2022-01-02T00:00:00",
+    ]
+    assert resumed_count == 1
+    assert resumed.getvalue().splitlines() == ["3"]
+
+
+def key_range_fetch(entities, with_scatter=True):
+    from noseiquela_orm.query import _key_order
+
+    def in_range(entity, query):
+        for prop, operation, value in query.filters:
+            if prop != "__key__":
+                continue
+            if operation == ">=" and _key_order(entity.key) < _key_order(value):
+                return False
+            if operation == "<" and _key_order(entity.key) >= _key_order(value):
+                return False
+        return True
+
+    def fetch(query, **kwargs):
+        if query.order == ["__scatter__"]:
+            sample = list(reversed(entities)) if with_scatter else []
+            return FakeIterator(sample, limit=kwargs.get("limit"))
+
+        return FakeIterator([
+            entity for entity in entities if in_range(entity, query)
+        ], **kwargs)
+
+    return mock.patch(
+        'google.cloud.datastore.query.Query.fetch',
+        autospec=True,
+        side_effect=fetch
+    )
+
+
+@pytest.mark.parametrize("with_scatter", [True, False])
+def test_query_result_parallel(with_scatter):
+    entities = [
+        mount_entity(Sample.kind, idx, int_prop=idx)
+        for idx in range(1, 101)
+    ] + [
+        mount_entity(Sample.kind, f"name-{idx}", int_prop=idx)
+        for idx in range(20)
+    ]
+
+    with key_range_fetch(entities, with_scatter):
+        parallel_result = Sample.query.all().parallel(workers=3, shards=4)
+        split_keys = parallel_result.split_keys()
+        shards = parallel_result.shards()
+        shard_ids = [[sample.id for sample in shard] for shard in shards]
+        out = [sample.id for sample in parallel_result]
+
+    assert len(split_keys) == 3
+    assert len(shards) == 4
+    assert all(shard_ids)
+    assert sorted(sum(shard_ids, []), key=str) == sorted(
+        [entity.key.id_or_name for entity in entities], key=str
+    )
+    assert sorted(out, key=str) == sorted(sum(shard_ids, []), key=str)
+
+    with pytest.raises(ValueError):
+        Sample.query.all(order_by=["int_prop"]).parallel()
+
+    with pytest.raises(ValueError):
+        Sample.query.all(start_cursor="10").parallel()
+
+
+def test_query_result_parallel_shards_keep_the_result_options():
+    with key_range_fetch([], with_scatter=False):
+        shards = Sample.query.all(prefetch=2, use_cache=False).parallel(
+            workers=2
+        ).shards()
+
+    assert [(shard.prefetch, shard.use_cache) for shard in shards] == [(2, False)]
+
+
+def test_query_result_cache():
+    from noseiquela_orm.cache import query_cache
+
+    class CachedQuerySample(Model):
+        int_prop = IntegerProperty()
+
+        class Meta:
+            query_cache_ttl = 30
+
+    query_cache.clear()
+    entities = [
+        mount_entity(CachedQuerySample.kind, idx, int_prop=idx)
+        for idx in range(1, 4)
+    ]
+
+    with fake_fetch(entities) as fetch:
+        first = list(CachedQuerySample.query.filter(int_prop__gt=0, int_prop__lt=9))
+        first[0].int_prop = 100
+        # same query, with the filters in another order.
+        second = list(CachedQuerySample.query.filter(int_prop__lt=9, int_prop__gt=0))
+        assert fetch.call_count == 1
+
+        list(CachedQuerySample.query.filter(int_prop__gt=0, use_cache=False))
+        list(CachedQuerySample.query.filter(int_prop__gt=1))
+        assert fetch.call_count == 3
+
+        with mock.patch.object(
+            CachedQuerySample._client._client, 'put_multi', return_value=None
+        ):
+            second[0].save(force=True)
+
+        list(CachedQuerySample.query.filter(int_prop__gt=0, int_prop__lt=9))
+        assert fetch.call_count == 4
+
+    assert [sample.as_dict() for sample in second] == [
+        {"id": idx, "int_prop": idx} for idx in range(1, 4)
+    ]
+
+    with fake_fetch(entities) as fetch:
+        list(Sample.query.all())
+        list(Sample.query.all())
+        list(Sample.query.all(use_cache=True))
+        list(Sample.query.all(use_cache=True))
+    assert fetch.call_count == 3
+
+
+def test_query_filter_by_parent_id():
+    from noseiquela_orm.types.key import KeyProperty
+
+    class ChildQuerySample(Model):
+        id = KeyProperty(parent=Sample)
+
+    result = ChildQuerySample.query.filter(parent_id=13)
+
+    assert result.query.ancestor == Sample._complete_g_key(13)
+    assert ChildQuerySample.query.filter(
+        parent_id=result.query.ancestor
+    ).query.ancestor == result.query.ancestor
+
+    with pytest.raises(ValueError):
+        Sample.query.filter(parent_id=13)
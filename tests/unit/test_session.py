@@ -0,0 +1,86 @@
+from unittest import mock
+
+import pytest
+
+import noseiquela_orm
+from noseiquela_orm.entity import Model
+from noseiquela_orm.session import current_session
+from noseiquela_orm.types.properties import IntegerProperty
+
+from .utils import Sample, fake_fetch, fake_get_multi, mount_samples
+
+
+class OtherSessionSample(Model):
+    int_prop = IntegerProperty()
+
+
+ENTITIES = mount_samples(range(10, 13))
+
+
+def test_session_identity_map():
+    with fake_get_multi(ENTITIES) as get_multi, fake_fetch(ENTITIES):
+        with noseiquela_orm.session() as session:
+            assert current_session() is session
+
+            first = Sample.get(10)
+            assert Sample.get(10) is first
+            assert get_multi.call_count == 1
+
+            out = Sample.get_multi([11, 10])
+            assert out[1] is first
+            assert [key.id_or_name for key in get_multi.call_args.kwargs["keys"]] == [11]
+
+            from_query = list(Sample.query.all())
+            assert from_query[:2] == [first, out[0]]
+            assert Sample.get(12) is from_query[2]
+            assert get_multi.call_count == 2
+
+            projected = list(Sample.query.all(projection=("int_prop",)))
+            assert projected[0] is not first
+
+        assert current_session() is None
+        assert Sample.get(10) is not first
+
+
+def test_session_flushes_the_saves_on_exit():
+    def put_multi(entities, retry, timeout):
+        for idx, entity in enumerate(entities):
+            if entity.key.is_partial:
+                entity.key = entity.key.completed_key(100 + idx)
+
+    with mock.patch.object(
+        Sample._client._client, 'put_multi', side_effect=put_multi
+    ) as g_put_multi:
+        with noseiquela_orm.session():
+            new_sample = Sample(int_prop=1)
+            new_sample.save()
+            new_sample.save()
+            other_sample = OtherSessionSample(id=42, int_prop=2)
+            OtherSessionSample.save_multi([other_sample])
+
+            assert OtherSessionSample.get(42) is other_sample
+            g_put_multi.assert_not_called()
+
+        assert new_sample.id == 100
+        assert g_put_multi.call_count == 1
+        assert [
+            entity.key.kind for entity in g_put_multi.call_args.kwargs["entities"]
+        ] == [Sample.kind, OtherSessionSample.kind]
+
+        with pytest.raises(RuntimeError):
+            with noseiquela_orm.session():
+                Sample(int_prop=3).save()
+                raise RuntimeError()
+
+        assert g_put_multi.call_count == 1
+
+
+def test_session_raises_the_failed_flushes():
+    with mock.patch.object(
+        Sample._client._client,
+        'put_multi',
+        side_effect=ValueError("commit failed")
+    ):
+        with pytest.raises(ValueError, match="commit failed"):
+            with noseiquela_orm.session():
+                Sample(int_prop=1).save()
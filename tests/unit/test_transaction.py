@@ -0,0 +1,224 @@
+from unittest import mock
+
+import pytest
+from google.api_core.exceptions import Aborted
+
+from noseiquela_orm.entity import Model
+from noseiquela_orm.types.key import KeyProperty
+from noseiquela_orm.types.properties import IntegerProperty
+
+from .utils import fake_fetch, mount_entity
+
+
+class TransactionSample(Model):
+    int_prop = IntegerProperty()
+
+    class Meta:
+        cache_size = 10
+
+
+def fake_transaction():
+    g_transaction = mock.MagicMock()
+
+    def commit():
+        for call in g_transaction.put.call_args_list:
+            entity = call.args[0]
+            if entity.key.is_partial:
+                entity.key = entity.key.completed_key(entity["int_prop"] + 1000)
+
+    g_transaction.commit.side_effect = commit
+    return mock.patch.object(
+        TransactionSample._client, 'transaction', return_value=g_transaction
+    )
+
+
+def test_transaction_buffers_the_writes():
+    existing = TransactionSample(id=1, int_prop=1)
+    new = TransactionSample(int_prop=2)
+
+    with fake_transaction() as transaction, mock.patch.object(
+        TransactionSample._client._client, 'put_multi'
+    ) as g_put_multi:
+        g_transaction = transaction.return_value
+        with TransactionSample.transaction():
+            existing.int_prop = 10
+            existing.save()
+            new.save()
+            TransactionSample.delete_multi([3])
+            TransactionSample(id=3, int_prop=3).delete()
+
+            g_transaction.put.assert_not_called()
+
+    g_put_multi.assert_not_called()
+    g_transaction.begin.assert_called_once()
+    g_transaction.commit.assert_called_once()
+    assert [call.args[0]["int_prop"] for call in g_transaction.put.call_args_list] == [10, 2]
+    assert [call.args[0].id for call in g_transaction.delete.call_args_list] == [3]
+    assert new.id == 1002
+    assert not (existing.is_dirty or new.is_dirty)
+
+
+def test_transaction_reads_from_the_transaction():
+    def get_multi(keys, deferred, retry, timeout, transaction):
+        assert transaction is g_transaction
+        return [
+            mount_entity(TransactionSample.kind, key.id_or_name, int_prop=key.id_or_name)
+            for key in keys
+        ]
+
+    with fake_transaction() as transaction, mock.patch.object(
+        TransactionSample._client._client, 'get_multi', side_effect=get_multi
+    ) as g_get_multi:
+        g_transaction = transaction.return_value
+        with TransactionSample.transaction(read_only=True):
+            first = TransactionSample.get(1)
+            again = TransactionSample.get(1)
+
+            with pytest.raises(ValueError):
+                first.save(force=True)
+
+    transaction.assert_called_once_with(read_only=True)
+    assert first.int_prop == again.int_prop == 1
+    assert g_get_multi.call_count == 2
+    assert TransactionSample.cache_stats().misses == 0
+
+
+def test_transaction_rolls_back_on_errors():
+    with fake_transaction() as transaction:
+        g_transaction = transaction.return_value
+        with pytest.raises(RuntimeError):
+            with TransactionSample.transaction():
+                TransactionSample(id=1, int_prop=1).save()
+                raise RuntimeError("something went wrong")
+
+    g_transaction.rollback.assert_called_once()
+    g_transaction.commit.assert_not_called()
+    g_transaction.put.assert_not_called()
+
+
+def test_transaction_rolls_back_when_the_commit_fails():
+    class ChildSample(Model):
+        id = KeyProperty(parent=TransactionSample)
+
+    with fake_transaction() as transaction:
+        g_transaction = transaction.return_value
+        g_transaction.rollback.side_effect = RuntimeError("rollback failed")
+        with pytest.raises(ValueError):
+            with TransactionSample.transaction():
+                ChildSample().save()  # no 'parent_id' to mount its key
+
+    g_transaction.rollback.assert_called_once()
+    g_transaction.commit.assert_not_called()
+
+
+def test_transaction_is_the_current_batch_of_the_client():
+    g_client = TransactionSample._client._client
+
+    with fake_transaction() as transaction:
+        g_transaction = transaction.return_value
+        with pytest.raises(RuntimeError):
+            with TransactionSample.transaction():
+                # read by the queries (and lookups) of the google client.
+                assert g_client.current_batch is g_transaction
+                raise RuntimeError("something went wrong")
+
+    assert g_client.current_batch is None
+
+
+def test_transaction_queries_skip_the_query_cache():
+    from noseiquela_orm.cache import query_cache
+
+    query_cache.clear()
+    entities = [
+        mount_entity(TransactionSample.kind, idx, int_prop=idx)
+        for idx in range(1, 4)
+    ]
+
+    def run_query(int_prop):
+        return list(TransactionSample.query.filter(int_prop__gt=int_prop, use_cache=True))
+
+    with fake_fetch(entities) as fetch, fake_transaction():
+        run_query(0)  # cached
+        with TransactionSample.transaction():
+            run_query(0)
+            run_query(1)
+        assert fetch.call_count == 3
+
+        run_query(0)
+        run_query(1)  # not cached by the transaction
+        assert fetch.call_count == 4
+
+    query_cache.clear()
+
+
+def test_transaction_nested_joins_the_outer_one():
+    class OtherSample(Model):
+        class Meta:
+            namespace = "other"
+
+    with fake_transaction() as transaction:
+        g_transaction = transaction.return_value
+        with TransactionSample.transaction() as outer:
+            with TransactionSample.transaction() as inner:
+                TransactionSample(id=1, int_prop=1).save()
+
+            assert inner is outer
+            g_transaction.commit.assert_not_called()
+
+            with pytest.raises(ValueError):
+                with OtherSample.transaction():
+                    ...
+
+    transaction.assert_called_once()
+    g_transaction.commit.assert_called_once()
+    assert [call.args[0].id for call in g_transaction.put.call_args_list] == [1]
+
+
+def test_transactional_nested_retries_the_outer_one():
+    calls = []
+
+    @TransactionSample.transactional()
+    def inner():
+        TransactionSample(id=2, int_prop=2).save()
+
+    @TransactionSample.transactional(retries=1)
+    def outer():
+        calls.append(1)
+        TransactionSample(id=1, int_prop=1).save()
+        inner()
+
+    with fake_transaction() as transaction, mock.patch(
+        'noseiquela_orm.transaction.sleep'
+    ):
+        g_transaction = transaction.return_value
+        g_transaction.commit.side_effect = [Aborted("contention"), None]
+        outer()
+
+    assert len(calls) == 2
+    assert transaction.call_count == 2
+    assert g_transaction.commit.call_count == 2
+
+
+def test_transactional_retries_on_contention():
+    calls = []
+
+    @TransactionSample.transactional(retries=2)
+    def increment(sample_id, by=1):
+        calls.append(sample_id)
+        TransactionSample(id=sample_id, int_prop=by).save()
+        return len(calls)
+
+    with fake_transaction() as transaction, mock.patch(
+        'noseiquela_orm.transaction.sleep'
+    ) as sleep:
+        g_transaction = transaction.return_value
+        g_transaction.commit.side_effect = [Aborted("contention"), None]
+        assert increment(1, by=5) == 2
+
+        g_transaction.commit.side_effect = Aborted("contention")
+        with pytest.raises(Aborted):
+            increment(1)
+
+    assert sleep.call_count == 3
+    assert all(0 <= call.args[0] <= 0.2 for call in sleep.call_args_list)
+    assert increment.__name__ == "increment"
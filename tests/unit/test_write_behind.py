@@ -0,0 +1,234 @@
+import os
+from queue import Full
+from threading import Event
+from unittest import mock
+
+import pytest
+
+from noseiquela_orm.entity import Model
+from noseiquela_orm.types.properties import IntegerProperty
+from noseiquela_orm.write_behind import WriteBehindQueue, write_behind_queue
+
+
+class WriteBehindSample(Model):
+    int_prop = IntegerProperty()
+
+
+def test_write_behind_queue_writes_in_batches():
+    queue = WriteBehindQueue(batch_size=10, max_latency=0.05)
+    samples = [WriteBehindSample(id=idx, int_prop=idx) for idx in range(1, 26)]
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi'
+    ) as g_put_multi:
+        for sample in samples:
+            queue.put(WriteBehindSample, sample.as_entity())
+        queue.flush()
+
+    assert queue.written == 25
+    assert len(queue) == 0
+    assert [len(call.kwargs["entities"]) for call in g_put_multi.call_args_list] == [10, 10, 5]
+
+    queue.close()
+
+
+def test_write_behind_queue_blocks_when_full():
+    release = Event()
+    queue = WriteBehindQueue(max_size=1, batch_size=1, max_latency=0)
+    entity = WriteBehindSample(id=1, int_prop=1).as_entity()
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi',
+        side_effect=lambda *args, **kwargs: release.wait(1)
+    ):
+        queue.put(WriteBehindSample, entity)  # taken by the flusher, which waits
+        queue.put(WriteBehindSample, entity)  # fills the queue
+        with pytest.raises(Full):
+            queue.put(WriteBehindSample, entity, timeout=0.01)
+
+        release.set()
+        queue.flush()
+
+    assert queue.written == 2
+    queue.close()
+
+
+def test_write_behind_queue_reports_the_failed_batches():
+    failures = []
+    queue = WriteBehindQueue(
+        batch_size=10,
+        max_latency=0.01,
+        on_failure=lambda entities, error: failures.append((len(entities), error))
+    )
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi',
+        side_effect=RuntimeError("commit failed")
+    ):
+        queue.put(WriteBehindSample, WriteBehindSample(id=1, int_prop=1).as_entity())
+        queue.flush()
+
+    assert queue.written == 0
+    assert queue.failed == 1
+    assert [(size, str(error)) for size, error in failures] == [(1, "commit failed")]
+    queue.close()
+
+
+def test_write_behind_queue_close_writes_what_is_left():
+    queue = WriteBehindQueue(batch_size=100, max_latency=10)
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi'
+    ) as g_put_multi:
+        queue.put(WriteBehindSample, WriteBehindSample(id=1, int_prop=1).as_entity())
+        queue.close()
+
+    assert g_put_multi.call_count == 1
+    assert queue.written == 1
+    assert not queue._thread.is_alive()
+
+
+def test_write_behind_queue_close_writes_serially():
+    queue = WriteBehindQueue(batch_size=100, max_latency=10)
+    samples = [WriteBehindSample(id=idx, int_prop=idx) for idx in range(1, 6)]
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi'
+    ) as g_put_multi, mock.patch(
+        'noseiquela_orm.client.MAX_MUTATIONS_PER_COMMIT', 2
+    ), mock.patch(
+        # as after the interpreter started to shut down.
+        'noseiquela_orm.client.ThreadPoolExecutor',
+        side_effect=RuntimeError("cannot schedule new futures after interpreter shutdown")
+    ):
+        for sample in samples:
+            queue.put(WriteBehindSample, sample.as_entity())
+        queue.close()
+
+    assert g_put_multi.call_count == 3
+    assert queue.written == 5
+    assert queue.failed == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_write_behind_queue_is_reset_in_forked_processes():
+    release = Event()
+    queue = WriteBehindQueue(batch_size=1, max_latency=0)
+    entity = WriteBehindSample(id=1, int_prop=1).as_entity()
+
+    with mock.patch.object(
+        WriteBehindSample._client._client, 'put_multi',
+        side_effect=lambda *args, **kwargs: release.wait(1)
+    ) as g_put_multi:
+        queue.put(WriteBehindSample, entity)
+        queue.put(WriteBehindSample, entity)
+
+        pid = os.fork()
+        if pid == 0:
+            # the pending saves stay with the parent.
+            calls = g_put_multi.call_count
+            queue.flush()
+            os._exit(int(
+                len(queue) != 0 or queue._thread is not None
+                or g_put_multi.call_count != calls
+            ))
+
+        _, status = os.waitpid(pid, 0)
+        release.set()
+        queue.flush()
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert queue.written == 2
+    queue.close()
+
+
+def test_write_behind_queue_with_invalid_sizes():
+    with pytest.raises(ValueError):
+        WriteBehindQueue(max_size=0)
+
+
+def test_model_with_write_behind_from_meta():
+    queue = WriteBehindQueue(max_latency=0.01)
+
+    class ModelSample(Model):
+        int_prop = IntegerProperty()
+
+        class Meta:
+            write_behind = queue
+
+    class DefaultSample(Model):
+        class Meta:
+            write_behind = True
+
+    assert ModelSample._write_behind is queue
+    assert DefaultSample._write_behind is write_behind_queue
+    assert WriteBehindSample._write_behind is None
+
+    sample = ModelSample(id=1, int_prop=1)
+    with mock.patch.object(queue, 'put') as put, mock.patch.object(
+        ModelSample._client._client, 'put_multi'
+    ) as g_put_multi:
+        sample.save()
+        sample.save()  # clean, not queued again
+        ModelSample.save_multi([ModelSample(id=2, int_prop=2)])
+        ModelSample(id=3, int_prop=3).save(deferred=False)
+
+    assert put.call_count == 2
+    assert not sample.is_dirty
+    assert g_put_multi.call_count == 1
+
+
+def test_model_save_deferred():
+    sample = WriteBehindSample(id=1, int_prop=1)
+    with mock.patch.object(write_behind_queue, 'put') as put:
+        sample.save(deferred=True)
+
+    put.assert_called_once()
+    model, g_entity = put.call_args.args
+    assert model is WriteBehindSample
+    assert g_entity.key.id == 1
+    assert not sample.is_dirty
+
+
+def test_model_save_deferred_allocates_the_new_ids():
+    new = WriteBehindSample(int_prop=1)
+    others = [WriteBehindSample(int_prop=idx) for idx in range(2, 4)]
+
+    def allocate_ids(incomplete_key, num_ids):
+        return [incomplete_key.completed_key(100 + idx) for idx in range(num_ids)]
+
+    with mock.patch.object(write_behind_queue, 'put') as put, mock.patch.object(
+        WriteBehindSample._client._client, 'allocate_ids', side_effect=allocate_ids
+    ) as g_allocate_ids:
+        new.save(deferred=True)
+        WriteBehindSample.save_multi(others, deferred=True)
+        new.save(deferred=True)  # clean, not queued again
+
+    assert g_allocate_ids.call_count == 2
+    assert new.id == 100
+    assert [other.id for other in others] == [100, 101]
+    assert [call.args[1].key.id for call in put.call_args_list] == [100, 100, 101]
+    assert not any(sample.is_dirty for sample in [new, *others])
+
+
+def test_model_flush_writes():
+    queue = WriteBehindQueue(max_latency=10)
+
+    class FlushSample(Model):
+        int_prop = IntegerProperty()
+
+        class Meta:
+            write_behind = queue
+
+    with mock.patch.object(
+        FlushSample._client._client, 'put_multi'
+    ) as g_put_multi:
+        FlushSample(id=1, int_prop=1).save()
+        FlushSample.flush_writes()
+        assert g_put_multi.call_count == 1
+
+        with mock.patch.object(write_behind_queue, 'flush') as flush:
+            WriteBehindSample.flush_writes()
+        flush.assert_called_once()
+
+    queue.close()
@@ -1,8 +1,19 @@
 import os
+from threading import Event
+from unittest import mock
 
 from google.cloud.datastore.entity import Entity as GEntity
 from google.cloud.datastore.key import Key as GKey
 
+from noseiquela_orm.entity import Model
+from noseiquela_orm.types.properties import IntegerProperty
+
+
+class Sample(Model):
+    """Model shared by the tests that only need a plain integer prop."""
+
+    int_prop = IntegerProperty()
+
 
 def mount_key(kind, id_or_name=None, parent=None):
     key = GKey(
@@ -34,3 +45,85 @@ def mount_entity(kind, id_or_name, parent=None, **props):
     )
     entity.update(props)
     return entity
+
+
+class FakeIterator:
+    """
+    Stands in for the ``google.cloud.datastore.query.Iterator`` returned by
+    ``Query.fetch``, serving the entities in pages.
+
+    Parameters:
+            entities (list): entities returned by the query
+            page_size (int): number of entities per page
+            limit (int): maximum number of entities returned
+            start_cursor (str): index (as str) of the first entity returned
+    """
+    def __init__(self, entities, page_size=None, limit=None, start_cursor=None, **_):
+        start = int(start_cursor) if start_cursor else 0
+        end = len(entities) if limit is None else min(start + limit, len(entities))
+
+        self._entities = entities[start:end]
+        self._end = end
+        self._has_more = end < len(entities)
+        self._page_size = page_size or len(self._entities) or 1
+        self.next_page_token = None
+
+    @property
+    def pages(self):
+        for start in range(0, len(self._entities), self._page_size):
+            yield iter(self._entities[start:start + self._page_size])
+        self.next_page_token = (
+            str(self._end).encode("ascii") if self._has_more else None
+        )
+
+    def __iter__(self):
+        for page in self.pages:
+            yield from page
+
+
+def mount_samples(ids, model=Sample, factor=1):
+    """
+    Responsible for assisting in the setting up of ``int_prop`` entities.
+
+    Parameters:
+            ids (iterable): entity ids
+            model (Model): model of the entities
+            factor (int): the ``int_prop`` of each entity is its id times it
+
+    Returns:
+        (list): ``Entity`` instances
+    """
+    return [
+        mount_entity(model.kind, idx, int_prop=idx * factor)
+        for idx in ids
+    ]
+
+
+def fake_fetch(entities, page_size=None):
+    """
+    Patches ``Query.fetch`` to serve the entities through a ``FakeIterator``.
+    """
+    return mock.patch(
+        'google.cloud.datastore.query.Query.fetch',
+        autospec=True,
+        side_effect=lambda query, **kwargs: FakeIterator(
+            entities, page_size=page_size, **kwargs
+        )
+    )
+
+
+def fake_get_multi(entities, model=Sample, delay=0):
+    """
+    Patches the lookups of the client of ``model`` to serve the entities
+    by id, waiting ``delay`` seconds on each call.
+    """
+    by_id = {entity.key.id_or_name: entity for entity in entities}
+
+    def get_multi(keys, **_):
+        if delay:
+            Event().wait(delay)
+        return [by_id[key.id_or_name] for key in keys if key.id_or_name in by_id]
+
+    return mock.patch.object(
+        model._client._client, 'get_multi', side_effect=get_multi
+    )